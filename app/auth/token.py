@@ -1,13 +1,18 @@
 from datetime import datetime, timedelta
+import hashlib
+import time
 from typing import Optional
 from jose import JWTError, jwt
 import os
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.database.db import get_db
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.database.db import get_async_db
 from app.models.user import User
+from app.utils.cache import TTLCache
 
 load_dotenv()
 
@@ -15,6 +20,22 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = "HS256"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Authenticated users keyed by token subject (username). Entries are
+# detached snapshots, so staleness across workers is bounded by the TTL;
+# in-process changes call ``invalidate_cached_user``. The 2FA secrets guard
+# security checks and are left out of the snapshots: code that reads them
+# calls ``load_twofa`` first.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+# Decoded payloads of verified tokens keyed by SHA-256 of the token. Each
+# entry expires at the token's ``exp`` (capped by TOKEN_CACHE_MAX_TTL_SECONDS),
+# so a cached token is never accepted past its expiry.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_MAX_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_MAX_TTL_SECONDS", "3600"))
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_MAX_TTL_SECONDS)
+
 
 def create_token(data: dict, expires_delta=timedelta(days=1)) -> str:
     to_encode = data.copy()
@@ -24,15 +45,69 @@ def create_token(data: dict, expires_delta=timedelta(days=1)) -> str:
 
 
 def verify_token(token: str) -> Optional[dict]:
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         return None
 
+    exp = payload.get("exp")
+    if exp is not None:
+        token_cache.set(digest, payload, ttl=exp - time.time())
+    return payload
+
+
+# Never served from the cache, see ``load_twofa``.
+TWOFA_ATTRIBUTES = ("twofa_secret", "pending_twofa_secret")
+
+
+def _detached_copy(user: User) -> User:
+    values = {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+        if attr.key not in TWOFA_ATTRIBUTES
+    }
+    snapshot = User(**values)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def load_user_by_username(db: Session, username: str) -> Optional[User]:
+    """Return the user for ``username`` attached to ``db``, using the cache.
+
+    A cache hit is merged into the session without a SELECT, so the
+    returned instance can still be modified and committed as usual.
+    """
+    cached = user_cache.get(username)
+    if cached is not None:
+        return db.merge(cached, load=False)
+
+    user = db.query(User).filter(User.username == username).first()
+    if user is not None:
+        user_cache.set(username, _detached_copy(user))
+    return user
+
+
+def load_twofa(db: Session, user: User) -> User:
+    """Read ``user``'s 2FA secrets from the database into the instance.
+
+    Users from ``load_user_by_username`` may come from a snapshot taken
+    before another worker changed them, so 2FA checks reload these columns.
+    """
+    db.refresh(user, attribute_names=TWOFA_ATTRIBUTES)
+    return user
+
+
+def invalidate_cached_user(username: str):
+    user_cache.pop(username)
+
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,7 +123,7 @@ async def get_current_user(
     if username is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.run_sync(load_user_by_username, username)
     if user is None:
         raise credentials_exception
 
@@ -1,8 +1,11 @@
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from app.database.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from starlette.concurrency import run_in_threadpool
 
 load_dotenv()
 
@@ -12,22 +15,136 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 
-SQLALCHEMY_DATABASE_URL = (
+# DATABASE_URL / ASYNC_DATABASE_URL override the Postgres settings above, e.g.
+# sqlite:///./local.db and sqlite+aiosqlite:///./local.db for a local stand-in.
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or (
     f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# With DB_ASYNC enabled request handlers use an asyncio engine, so concurrency
+# is bounded by the connection pool instead of the threadpool. Migrations,
+# scripts and background jobs always use the synchronous engine.
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+
+# Each gunicorn worker has its own pool, so the server sees up to
+# WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Pre-ping costs a round trip per checkout. Connections are instead recycled
+# before server or proxy idle timeouts and TCP keepalives detect dead peers;
+# a connection that still fails invalidates the pool on first error.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+DB_TCP_KEEPALIVE_IDLE = int(os.getenv("DB_TCP_KEEPALIVE_IDLE", "30"))
+
+
+def _engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+    is_async = "+asyncpg" in url
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        # Reuse the most recent connection so surplus ones sit idle and
+        # get recycled instead of all staying warm.
+        "pool_use_lifo": True,
+    }
+    if not is_async:
+        options["connect_args"] = {
+            "keepalives": 1,
+            "keepalives_idle": DB_TCP_KEEPALIVE_IDLE,
+            "keepalives_interval": 10,
+            "keepalives_count": 3,
+        }
+    return options
+
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, pool_size=5, max_overflow=10
+    SQLALCHEMY_DATABASE_URL, **_engine_options(SQLALCHEMY_DATABASE_URL)
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = (
+    create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL))
+    if DB_ASYNC
+    else None
+)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False)
+    if DB_ASYNC
+    else None
+)
+
 Base = declarative_base()
 
 
+class ThreadedSession:
+    """A sync ``Session`` behind the part of the ``AsyncSession`` API routers use.
+
+    ``run_sync`` hands the session to a function on the threadpool, which is
+    how sync endpoints ran before; it lets the routers be written once for
+    both engines.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Yield an ``AsyncSession``, or a ``ThreadedSession`` when DB_ASYNC is off.
+
+    Database work is done through ``await db.run_sync(fn, ...)`` where ``fn``
+    receives a regular ``Session``. ORM attributes must not be lazy loaded or
+    refreshed outside of ``run_sync``, so helpers return plain data.
+    """
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = ThreadedSession(SessionLocal())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def run_in_session(fn, *args, **kwargs):
+    """Run ``fn(session, ...)`` in its own session and close it right after.
+
+    For long-lived handlers such as websockets, which must not keep a pooled
+    connection checked out for their whole lifetime.
+    """
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+
+    db = ThreadedSession(SessionLocal())
+    try:
+        return await db.run_sync(fn, *args, **kwargs)
+    finally:
+        await db.close()
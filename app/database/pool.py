@@ -0,0 +1,110 @@
+import bisect
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Thread-safe fixed-bucket latency histogram in milliseconds."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float):
+        index = bisect.bisect_left(self.buckets, value_ms)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value_ms
+            self._max = max(self._max, value_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total_ms, max_ms = self._sum, self._max
+        count = sum(counts)
+        buckets = {f"le_{bound:g}": n for bound, n in zip(self.buckets, counts)}
+        buckets["inf"] = counts[-1]
+        return {
+            "count": count,
+            "sum_ms": round(total_ms, 3),
+            "avg_ms": round(total_ms / count, 3) if count else 0.0,
+            "max_ms": round(max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout, including any wait for a free connection.
+
+    ``checkout`` covers the whole acquisition (queue wait plus connecting
+    when the pool grows); ``wait`` only records checkouts that found no idle
+    connection, which is the signal that the pool is undersized.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_latency = Histogram()
+        self.wait_latency = Histogram()
+        self.timeouts = 0
+
+    def _do_get(self):
+        had_idle = self.checkedin() > 0
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.checkout_latency.observe(elapsed_ms)
+            if not had_idle:
+                self.wait_latency.observe(elapsed_ms)
+
+    def recreate(self):
+        # Keep the counters when the engine replaces the pool after a
+        # disconnect, so metrics survive a database restart.
+        pool = super().recreate()
+        pool.checkout_latency = self.checkout_latency
+        pool.wait_latency = self.wait_latency
+        pool.timeouts = self.timeouts
+        return pool
+
+    def metrics(self) -> dict:
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "timeouts": self.timeouts,
+            "checkout_latency": self.checkout_latency.snapshot(),
+            "wait_latency": self.wait_latency.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_metrics(engine) -> dict | None:
+    """Metrics for ``engine``'s pool, or None if it is not instrumented."""
+    if engine is None:
+        return None
+    pool = engine.pool
+    if not isinstance(pool, _InstrumentedPoolMixin):
+        return None
+    return pool.metrics()
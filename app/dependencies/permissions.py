@@ -1,19 +1,16 @@
 from app.auth.token import get_current_user
-from app.database.db import get_db
+from app.database.db import get_async_db
 from app.models.invite import Invite
 from app.models.project import Project
 from app.models.todo import Todo
 from app.models.user import User
 from app.utils.project import get_project
 from fastapi import Depends, HTTPException, Path, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 
-def require_project_member(
-    project_id: str = Path(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> Project:
+def check_project_member(db: Session, project_id: str, current_user: User) -> Project:
     project = get_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -28,11 +25,7 @@ def require_project_member(
     return project
 
 
-def require_project_owner(
-    project_id: str = Path(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> Project:
+def check_project_owner(db: Session, project_id: str, current_user: User) -> Project:
     project = get_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -45,11 +38,7 @@ def require_project_owner(
     return project
 
 
-def require_invite_owner(
-    invite_id: str = Path(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> Invite:
+def check_invite_owner(db: Session, invite_id: str, current_user: User) -> Invite:
     invite = db.query(Invite).filter(Invite.id == invite_id).first()
     if not invite:
         raise HTTPException(status_code=404, detail="Invite not found")
@@ -65,11 +54,7 @@ def require_invite_owner(
     return invite
 
 
-def require_todo_permission(
-    todo_id: str = Path(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> Todo:
+def check_todo_permission(db: Session, todo_id: str, current_user: User) -> Todo:
     todo = db.query(Todo).filter(Todo.id == todo_id).first()
     if not todo:
         raise HTTPException(status_code=404, detail="Todo not found")
@@ -82,3 +67,35 @@ def require_todo_permission(
             detail="Not authorized to modify this todo",
         )
     return todo
+
+
+async def require_project_member(
+    project_id: str = Path(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+) -> Project:
+    return await db.run_sync(check_project_member, project_id, current_user)
+
+
+async def require_project_owner(
+    project_id: str = Path(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+) -> Project:
+    return await db.run_sync(check_project_owner, project_id, current_user)
+
+
+async def require_invite_owner(
+    invite_id: str = Path(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+) -> Invite:
+    return await db.run_sync(check_invite_owner, invite_id, current_user)
+
+
+async def require_todo_permission(
+    todo_id: str = Path(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+) -> Todo:
+    return await db.run_sync(check_todo_permission, todo_id, current_user)
@@ -18,8 +18,13 @@ def upgrade():
                 )
             )
 
+        # SQLite cannot add constraints to an existing table; there the
+        # column only ever comes from create_all, which declares the FK.
         existing_fks = [fk["name"] for fk in inspector.get_foreign_keys("todos")]
-        if "fk_todos_assigned_user" not in existing_fks:
+        if (
+            connection.dialect.name == "postgresql"
+            and "fk_todos_assigned_user" not in existing_fks
+        ):
             connection.execute(
                 text(
                     "ALTER TABLE todos ADD CONSTRAINT fk_todos_assigned_user FOREIGN KEY (assigned_user_id) REFERENCES users(id) ON DELETE SET NULL"
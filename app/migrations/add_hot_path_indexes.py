@@ -0,0 +1,81 @@
+import logging
+from sqlalchemy import inspect, text
+from app.database.db import engine
+
+logger = logging.getLogger(__name__)
+
+# (index name, table, columns, unique)
+INDEXES = [
+    ("idx_todos_project_id", "todos", ("project_id",), False),
+    ("idx_teams_user_id_project_id", "teams", ("user_id", "project_id"), False),
+    ("idx_teams_project_id", "teams", ("project_id",), False),
+    ("idx_projects_user_id", "projects", ("user_id",), False),
+    (
+        "idx_user_notifications_user_id_read",
+        "user_notifications",
+        ("user_id", "read"),
+        False,
+    ),
+    ("idx_notifications_project_id", "notifications", ("project_id",), False),
+    ("idx_invites_project_id", "invites", ("project_id",), False),
+    ("uq_users_username", "users", ("username",), True),
+]
+
+# Used instead of the unique index when legacy rows share a username.
+FALLBACK_USERNAME_INDEX = "idx_users_username"
+
+
+def _has_duplicate_usernames(connection) -> bool:
+    return (
+        connection.execute(
+            text("SELECT username FROM users GROUP BY username HAVING COUNT(*) > 1 LIMIT 1")
+        ).first()
+        is not None
+    )
+
+
+def create_indexes(connection):
+    """Create every hot-path index that does not exist yet."""
+    inspector = inspect(connection)
+    for name, table, columns, unique in INDEXES:
+        existing_indexes = {idx["name"] for idx in inspector.get_indexes(table)}
+        if name in existing_indexes:
+            continue
+        if unique and _has_duplicate_usernames(connection):
+            logger.warning(
+                "Duplicate usernames found, creating non-unique %s instead of %s.",
+                FALLBACK_USERNAME_INDEX,
+                name,
+            )
+            name, unique = FALLBACK_USERNAME_INDEX, False
+        connection.execute(
+            text(
+                f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} "
+                f"ON {table} ({', '.join(columns)})"
+            )
+        )
+
+
+def drop_indexes(connection):
+    for name, _table, _columns, _unique in INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    connection.execute(text(f"DROP INDEX IF EXISTS {FALLBACK_USERNAME_INDEX}"))
+
+
+def upgrade():
+    """Apply the migration – create indexes for the per-request lookups."""
+    with engine.begin() as connection:
+        create_indexes(connection)
+        logger.info("Hot path indexes ensured.")
+
+
+def downgrade():
+    """Revert the migration – drop the hot path indexes."""
+    with engine.begin() as connection:
+        drop_indexes(connection)
+        logger.info("Hot path indexes dropped.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade()
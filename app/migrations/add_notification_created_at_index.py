@@ -0,0 +1,35 @@
+import logging
+from sqlalchemy import inspect, text
+from app.database.db import engine
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "idx_notifications_created_at"
+
+
+def upgrade():
+    """Apply the migration – index notifications for the retention orphan sweep."""
+    with engine.begin() as connection:
+        existing_indexes = {
+            idx["name"] for idx in inspect(connection).get_indexes("notifications")
+        }
+        if INDEX_NAME not in existing_indexes:
+            connection.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} "
+                    "ON notifications (created_at, id)"
+                )
+            )
+        logger.info("Notification created_at index ensured.")
+
+
+def downgrade():
+    """Revert the migration – drop the created_at index."""
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP INDEX IF EXISTS {INDEX_NAME}"))
+        logger.info("Notification created_at index dropped.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade()
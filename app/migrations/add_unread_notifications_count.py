@@ -0,0 +1,46 @@
+import logging
+from sqlalchemy import inspect, text
+from app.database.db import engine
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade():
+    """Apply the migration – add and backfill users.unread_notifications_count."""
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        columns = [col["name"] for col in inspector.get_columns("users")]
+
+        if "unread_notifications_count" not in columns:
+            connection.execute(
+                text(
+                    "ALTER TABLE users ADD COLUMN IF NOT EXISTS "
+                    "unread_notifications_count INTEGER NOT NULL DEFAULT 0"
+                )
+            )
+
+        # Runs whether or not the column was just added, so a table created
+        # by create_all before this migration is counted too.
+        connection.execute(
+            text(
+                "UPDATE users SET unread_notifications_count = counts.unread "
+                "FROM (SELECT user_id, COUNT(*) AS unread FROM user_notifications "
+                "WHERE read = false GROUP BY user_id) AS counts "
+                "WHERE users.id = counts.user_id"
+            )
+        )
+        logger.info("Migration for 'unread_notifications_count' ensured.")
+
+
+def downgrade():
+    """Revert the migration – drop the unread counter column."""
+    with engine.begin() as connection:
+        connection.execute(
+            text("ALTER TABLE users DROP COLUMN IF EXISTS unread_notifications_count")
+        )
+        logger.info("Migration for 'unread_notifications_count' reverted successfully.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade()
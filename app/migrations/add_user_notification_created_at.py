@@ -0,0 +1,69 @@
+import logging
+from sqlalchemy import inspect, text
+from app.database.db import engine
+
+logger = logging.getLogger(__name__)
+
+FEED_INDEXES = [
+    (
+        "idx_user_notifications_feed",
+        "CREATE INDEX IF NOT EXISTS idx_user_notifications_feed "
+        "ON user_notifications (user_id, created_at, notification_id)",
+    ),
+    (
+        "idx_user_notifications_unread_feed",
+        "CREATE INDEX IF NOT EXISTS idx_user_notifications_unread_feed "
+        "ON user_notifications (user_id, created_at, notification_id) "
+        "WHERE read = false",
+    ),
+]
+
+
+def upgrade():
+    """Apply the migration – copy created_at onto user_notifications and index the feed."""
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        columns = [col["name"] for col in inspector.get_columns("user_notifications")]
+
+        if "created_at" not in columns:
+            connection.execute(
+                text(
+                    "ALTER TABLE user_notifications ADD COLUMN IF NOT EXISTS created_at TIMESTAMP"
+                )
+            )
+            connection.execute(
+                text(
+                    "UPDATE user_notifications SET created_at = notifications.created_at "
+                    "FROM notifications "
+                    "WHERE notifications.id = user_notifications.notification_id "
+                    "AND user_notifications.created_at IS NULL"
+                )
+            )
+            connection.execute(
+                text("ALTER TABLE user_notifications ALTER COLUMN created_at SET NOT NULL")
+            )
+
+        existing_indexes = {
+            idx["name"] for idx in inspector.get_indexes("user_notifications")
+        }
+        for name, statement in FEED_INDEXES:
+            if name not in existing_indexes:
+                connection.execute(text(statement))
+
+        logger.info("Migration for 'user_notifications.created_at' ensured.")
+
+
+def downgrade():
+    """Revert the migration – drop the feed indexes and the column."""
+    with engine.begin() as connection:
+        for name, _statement in FEED_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        connection.execute(
+            text("ALTER TABLE user_notifications DROP COLUMN IF EXISTS created_at")
+        )
+        logger.info("Migration for 'user_notifications.created_at' reverted successfully.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade()
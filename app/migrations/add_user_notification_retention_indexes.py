@@ -0,0 +1,44 @@
+import logging
+from sqlalchemy import inspect, text
+from app.database.db import engine
+
+logger = logging.getLogger(__name__)
+
+RETENTION_INDEXES = [
+    (
+        "idx_user_notifications_notification_id",
+        "CREATE INDEX IF NOT EXISTS idx_user_notifications_notification_id "
+        "ON user_notifications (notification_id)",
+    ),
+    (
+        "idx_user_notifications_read_created_at",
+        "CREATE INDEX IF NOT EXISTS idx_user_notifications_read_created_at "
+        "ON user_notifications (created_at) WHERE read = true",
+    ),
+]
+
+
+def upgrade():
+    """Apply the migration – index user_notifications for the retention job."""
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        existing_indexes = {
+            idx["name"] for idx in inspector.get_indexes("user_notifications")
+        }
+        for name, statement in RETENTION_INDEXES:
+            if name not in existing_indexes:
+                connection.execute(text(statement))
+        logger.info("Retention indexes ensured.")
+
+
+def downgrade():
+    """Revert the migration – drop the retention indexes."""
+    with engine.begin() as connection:
+        for name, _statement in RETENTION_INDEXES:
+            connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        logger.info("Retention indexes dropped.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade()
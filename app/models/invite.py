@@ -1,10 +1,11 @@
-from sqlalchemy import Column, String, DateTime, Integer, Boolean, ForeignKey, func
+from sqlalchemy import Column, String, DateTime, Integer, Boolean, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.database.db import Base
 
 
 class Invite(Base):
     __tablename__ = "invites"
+    __table_args__ = (Index("idx_invites_project_id", "project_id"),)
     id = Column(String(36), primary_key=True)
     project_id = Column(String(36), ForeignKey("projects.id"), nullable=False)
     created_at = Column(DateTime, nullable=False, default=func.now())
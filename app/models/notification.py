@@ -1,10 +1,15 @@
-from sqlalchemy import Column, String, DateTime, func, ForeignKey
+from sqlalchemy import Column, String, DateTime, func, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database.db import Base
 
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("idx_notifications_project_id", "project_id"),
+        # Retention: the orphan sweep walks old notifications in this order.
+        Index("idx_notifications_created_at", "created_at", "id"),
+    )
     id = Column(String(36), primary_key=True)
     title = Column(String(200), nullable=False)
     description = Column(String(1000), nullable=True)
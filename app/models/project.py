@@ -1,10 +1,11 @@
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database.db import Base
 
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (Index("idx_projects_user_id", "user_id"),)
     id = Column(String(36), primary_key=True)
     name = Column(String(100), nullable=False)
     user_id = Column(String(36), ForeignKey("users.id"))
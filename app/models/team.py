@@ -1,10 +1,14 @@
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database.db import Base
 
 
 class Team(Base):
     __tablename__ = "teams"
+    __table_args__ = (
+        Index("idx_teams_user_id_project_id", "user_id", "project_id"),
+        Index("idx_teams_project_id", "project_id"),
+    )
     id = Column(String(36), primary_key=True)
     project_id = Column(String(36), ForeignKey("projects.id"), nullable=False)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, String, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from app.database.db import Base
 import enum
@@ -19,6 +19,7 @@ class TodoPriority(enum.Enum):
 
 class Todo(Base):
     __tablename__ = "todos"
+    __table_args__ = (Index("idx_todos_project_id", "project_id"),)
     id = Column(String(36), primary_key=True)
     title = Column(String(200), nullable=False)
     description = Column(String(1000), nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, Index
 from sqlalchemy.orm import relationship
 from app.database.db import Base
 from app.models.todo import Todo
@@ -6,12 +6,19 @@ from app.models.todo import Todo
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (Index("uq_users_username", "username", unique=True),)
     id = Column(String(36), primary_key=True)
     username = Column(String(50), nullable=False)
     password = Column(String(255), nullable=False)
     twofa_secret = Column(String(32), nullable=True)
     pending_twofa_secret = Column(String(32), nullable=True)
     avatar_id = Column(Integer, nullable=False)
+    # Maintained by app.utils.notification_utils in the same transactions
+    # that create and read notifications. Cached User objects carry a stale
+    # copy, so read it with get_unread_count.
+    unread_notifications_count = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
 
     projects = relationship("Project", back_populates="user")
     todos = relationship("Todo", foreign_keys=[Todo.user_id], back_populates="user")
@@ -1,15 +1,38 @@
-from sqlalchemy import Column, String, Boolean, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index, func, text
 from sqlalchemy.orm import relationship
 from app.database.db import Base
 
 
 class UserNotification(Base):
     __tablename__ = "user_notifications"
+    __table_args__ = (
+        Index("idx_user_notifications_user_id_read", "user_id", "read"),
+        # Keyset pagination of a user's feed, newest first.
+        Index(
+            "idx_user_notifications_feed", "user_id", "created_at", "notification_id"
+        ),
+        Index(
+            "idx_user_notifications_unread_feed",
+            "user_id",
+            "created_at",
+            "notification_id",
+            postgresql_where=text("read = false"),
+        ),
+        # Retention: orphan checks and the scan for old read rows.
+        Index("idx_user_notifications_notification_id", "notification_id"),
+        Index(
+            "idx_user_notifications_read_created_at",
+            "created_at",
+            postgresql_where=text("read = true"),
+        ),
+    )
     user_id = Column(String(36), ForeignKey("users.id"), primary_key=True)
     notification_id = Column(
         String(36), ForeignKey("notifications.id"), primary_key=True
     )
     read = Column(Boolean, nullable=False, default=False)
+    # Copy of notifications.created_at so the feed is ordered by an index.
+    created_at = Column(DateTime, nullable=False, default=func.now())
 
     user = relationship("User", back_populates="notifications")
     notification = relationship("Notification", back_populates="user_notifications")
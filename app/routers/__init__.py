@@ -10,6 +10,7 @@ from .invite import router as invite_router
 from .team import router as team_router
 from .form import router as form_router
 from .websocket import router as websocket_router
+from .metrics import router as metrics_router
 
 router = APIRouter()
 router.include_router(login_router, tags=["auth"])
@@ -23,3 +24,4 @@ router.include_router(invite_router, tags=["invite"])
 router.include_router(team_router, tags=["team management"])
 router.include_router(form_router, tags=["form"])
 router.include_router(websocket_router, tags=["realtime"])
+router.include_router(metrics_router, tags=["internal"])
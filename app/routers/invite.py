@@ -3,10 +3,11 @@ from typing import List
 import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.auth.token import get_current_user
-from app.database.db import get_db
+from app.database.db import get_async_db
 from app.dependencies.permissions import require_invite_owner, require_project_owner
 from app.models.invite import Invite
 from app.models.project import Project
@@ -14,7 +15,7 @@ from app.models.team import Team
 from app.models.user import User
 from app.schemas.invite import InviteCreate, InviteResponse, InviteUpdate
 from app.utils.notification_utils import create_project_notification
-from app.websockets.connection_manager import manager
+from app.websockets.connection_manager import manager, project_topic
 
 router = APIRouter()
 
@@ -44,12 +45,7 @@ def parse_duration(duration: str | None):
     raise HTTPException(status_code=400, detail="Invalid duration format")
 
 
-@router.post("/project/{project_id}/invite", response_model=InviteResponse)
-def create_invite(
-    invite_data: InviteCreate,
-    project: Project = Depends(require_project_owner),
-    db: Session = Depends(get_db),
-):
+def _create_invite(db: Session, invite_data: InviteCreate, project: Project):
     expires_at = parse_duration(invite_data.duration)
 
     max_usage: int | None
@@ -68,11 +64,19 @@ def create_invite(
     db.add(new_invite)
     db.commit()
     db.refresh(new_invite)
-    return new_invite
+    return InviteResponse.model_validate(new_invite)
 
 
-@router.get("/invite/{invite_id}", response_model=InviteResponse)
-def get_invite(invite_id: str, db: Session = Depends(get_db)):
+@router.post("/project/{project_id}/invite", response_model=InviteResponse)
+async def create_invite(
+    invite_data: InviteCreate,
+    project: Project = Depends(require_project_owner),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(_create_invite, invite_data, project)
+
+
+def _get_invite(db: Session, invite_id: str):
     invite = db.query(Invite).filter(Invite.id == invite_id).first()
     if not invite:
         raise HTTPException(status_code=404, detail="Invite not found")
@@ -93,12 +97,16 @@ def get_invite(invite_id: str, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/invite/{invite_id}/join")
-def join_invite(
+@router.get("/invite/{invite_id}", response_model=InviteResponse)
+async def get_invite(
     invite_id: str,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(_get_invite, invite_id)
+
+
+def _join_invite(
+    db: Session, invite_id: str, background_tasks: BackgroundTasks, current_user: User
 ):
     invite = db.query(Invite).filter(Invite.id == invite_id).first()
     if not invite:
@@ -130,10 +138,6 @@ def join_invite(
         db, title=title, description=description, project_id=project.id
     )
 
-    recipients = {project.user_id}
-    for tm in project.team_members:
-        recipients.add(tm.user_id)
-    recipients.remove(current_user.id)
     message = {
         "event": "team.member_joined",
         "project_id": project.id,
@@ -144,16 +148,26 @@ def join_invite(
             "avatar_id": current_user.avatar_id,
         },
     }
-    background_tasks.add_task(manager.ts_broadcast, list(recipients), message)
+    background_tasks.add_task(
+        manager.ts_publish,
+        project_topic(project.id),
+        message,
+        subscribe=[current_user.id],
+    )
     return {"message": "Joined project successfully"}
 
 
-@router.patch("/invite/{invite_id}", response_model=InviteResponse)
-def update_invite(
-    invite_update: InviteUpdate,
-    invite: Invite = Depends(require_invite_owner),
-    db: Session = Depends(get_db),
+@router.post("/invite/{invite_id}/join")
+async def join_invite(
+    invite_id: str,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
 ):
+    return await db.run_sync(_join_invite, invite_id, background_tasks, current_user)
+
+
+def _update_invite(db: Session, invite_update: InviteUpdate, invite: Invite):
     if invite_update.duration is not None:
         invite.expires_at = parse_duration(invite_update.duration)
     if invite_update.max_usage is not None:
@@ -162,25 +176,33 @@ def update_invite(
         invite.active = invite_update.active
     db.commit()
     db.refresh(invite)
-    return invite
+    return InviteResponse.model_validate(invite)
 
 
-@router.delete("/invite/{invite_id}")
-def delete_invite(
+@router.patch("/invite/{invite_id}", response_model=InviteResponse)
+async def update_invite(
+    invite_update: InviteUpdate,
     invite: Invite = Depends(require_invite_owner),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    return await db.run_sync(_update_invite, invite_update, invite)
+
+
+def _delete_invite(db: Session, invite: Invite):
     db.delete(invite)
     db.commit()
     return {"message": "Invite deleted successfully"}
 
 
-@router.get("/project/{project_id}/invites", response_model=List[InviteResponse])
-def get_invites_for_project(
-    project_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.delete("/invite/{invite_id}")
+async def delete_invite(
+    invite: Invite = Depends(require_invite_owner),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    return await db.run_sync(_delete_invite, invite)
+
+
+def _get_invites_for_project(db: Session, project_id: str, current_user: User):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -189,4 +211,13 @@ def get_invites_for_project(
             status_code=403, detail="Only the project owner can view invites"
         )
     invites = db.query(Invite).filter(Invite.project_id == project_id).all()
-    return invites
+    return [InviteResponse.model_validate(invite) for invite in invites]
+
+
+@router.get("/project/{project_id}/invites", response_model=List[InviteResponse])
+async def get_invites_for_project(
+    project_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await db.run_sync(_get_invites_for_project, project_id, current_user)
@@ -1,22 +1,38 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.auth.token import create_token
-from app.database.db import get_db
+from app.database.db import get_async_db
 from app.models import User
 from app.schemas.auth import LoginSchema
-from app.utils.password import verify_password
+from app.utils.password import needs_rehash, verify_password_async
+from app.utils.password_policy import rehash_password
 
 router = APIRouter()
 
 
+def _find_user(db: Session, username: str) -> User | None:
+    return db.query(User).filter(User.username == username).first()
+
+
 @router.post("/login")
-def login(auth: LoginSchema, db: Session = Depends(get_db), remember_me: bool = False):
-    user = db.query(User).filter(User.username == auth.username).first()
-    if not user or not verify_password(user.password, auth.password):
+async def login(
+    auth: LoginSchema,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    remember_me: bool = False,
+):
+    user = await db.run_sync(_find_user, auth.username)
+    if not user or not await verify_password_async(user.password, auth.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    if needs_rehash(user.password):
+        background_tasks.add_task(
+            rehash_password, user.id, user.username, user.password, auth.password
+        )
+
     expires_delta = timedelta(days=30) if remember_me else timedelta(hours=2)
 
     access_token = create_token(
@@ -0,0 +1,41 @@
+import hmac
+import os
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, Header, HTTPException
+
+from app.auth.token import token_cache, user_cache
+from app.database.db import async_engine, engine
+from app.database.pool import pool_metrics
+from app.websockets.connection_manager import manager
+
+load_dotenv()
+
+# Internal metrics for sizing the pool and caches. The endpoint does not
+# exist unless METRICS_TOKEN is set, and then requires it in X-Metrics-Token.
+# Numbers are per worker process; scrape each worker or aggregate by pid.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+router = APIRouter()
+
+
+def _check_metrics_token(token: str | None):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token, METRICS_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
+
+
+@router.get("/internal/metrics", include_in_schema=False)
+async def get_metrics(x_metrics_token: str | None = Header(default=None)):
+    _check_metrics_token(x_metrics_token)
+    return {
+        "pid": os.getpid(),
+        "db_pool": pool_metrics(engine),
+        "db_async_pool": pool_metrics(async_engine),
+        "caches": {
+            "users": user_cache.stats(),
+            "tokens": token_cache.stats(),
+        },
+        "websockets": manager.stats(),
+    }
@@ -1,49 +1,74 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.auth.token import get_current_user
-from app.database.db import get_db
-from app.models.notification import Notification
+from app.database.db import get_async_db
 from app.models.user_notification import UserNotification
-from app.schemas.notification import NotificationResponse
+from app.schemas.notification import (
+    NotificationFeedQuery,
+    NotificationFeedResponse,
+    NotificationReadRequest,
+    NotificationResponse,
+)
+from app.utils.notification_utils import (
+    get_unread_count,
+    list_notifications,
+    mark_notifications_read,
+    notification_feed_cursor,
+    push_unread_count,
+)
 from app.websockets.connection_manager import manager
 
 router = APIRouter()
 
 
+def _get_notifications(db: Session, current_user):
+    return list_notifications(db, current_user.id)
+
+
 @router.get("/notifications", response_model=List[NotificationResponse])
-def get_notifications(
-    db: Session = Depends(get_db), current_user=Depends(get_current_user)
+async def get_notifications(
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
 ):
-    user_notifs = (
-        db.query(UserNotification)
-        .join(Notification)
-        .filter(UserNotification.user_id == current_user.id)
-        .all()
-    )
-    result = []
-    for un in user_notifs:
-        notif = un.notification
-        result.append(
-            NotificationResponse(
-                id=notif.id,
-                title=notif.title,
-                description=notif.description,
-                created_at=notif.created_at,
-                read=un.read,
-                project_id=notif.project_id,
-            )
+    return await db.run_sync(_get_notifications, current_user)
+
+
+def _get_notification_feed(db: Session, filters: NotificationFeedQuery, current_user):
+    try:
+        notifications = list_notifications(
+            db,
+            current_user.id,
+            unread_only=filters.unread_only,
+            cursor=filters.cursor,
+            limit=filters.limit + 1,
         )
-    result.sort(key=lambda n: n.created_at, reverse=True)
-    return result
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
+    next_cursor = None
+    if len(notifications) > filters.limit:
+        notifications = notifications[: filters.limit]
+        next_cursor = notification_feed_cursor(notifications[-1])
+    return {
+        "notifications": notifications,
+        "next_cursor": next_cursor,
+        "unread_notifications_count": get_unread_count(db, current_user.id),
+    }
 
-@router.post("/notifications/{notification_id}/read")
-def mark_notification_as_read(
-    notification_id: str,
-    db: Session = Depends(get_db),
+
+@router.get("/notifications/feed", response_model=NotificationFeedResponse)
+async def get_notification_feed(
+    filters: NotificationFeedQuery = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
+    """Page through the current user's notifications, newest first."""
+    return await db.run_sync(_get_notification_feed, filters, current_user)
+
+
+def _mark_notification_as_read(db: Session, notification_id: str, current_user):
     user_notif = (
         db.query(UserNotification)
         .filter_by(user_id=current_user.id, notification_id=notification_id)
@@ -52,25 +77,18 @@ def mark_notification_as_read(
     if not user_notif:
         raise HTTPException(status_code=404, detail="Notification not found")
 
-    if user_notif.read:
-        unread_count = (
-            db.query(UserNotification)
-            .filter_by(user_id=current_user.id, read=False)
-            .count()
-        )
+    # Conditional on read = false so concurrent requests decrement once.
+    marked, unread_count = mark_notifications_read(
+        db, current_user.id, [notification_id]
+    )
+    if not marked:
         return {
             "message": "Notification already marked as read",
             "unread_notifications_count": unread_count,
         }
 
-    user_notif.read = True
     db.commit()
-
-    unread_count = (
-        db.query(UserNotification)
-        .filter_by(user_id=current_user.id, read=False)
-        .count()
-    )
+    push_unread_count(current_user.id, unread_count)
 
     return {
         "message": "Notification marked as read",
@@ -78,39 +96,71 @@ def mark_notification_as_read(
     }
 
 
-@router.post("/notifications/read-all")
-def mark_all_notifications_as_read(
-    db: Session = Depends(get_db),
+@router.post("/notifications/{notification_id}/read")
+async def mark_notification_as_read(
+    notification_id: str,
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ):
-    """Mark every unread notification for the current user as read."""
-    unread_notifs = (
-        db.query(UserNotification)
-        .filter_by(user_id=current_user.id, read=False)
-        .all()
-    )
+    return await db.run_sync(_mark_notification_as_read, notification_id, current_user)
 
-    if not unread_notifs:
-        manager.ts_send_personal(
-            current_user.id,
-            {"event": "notification.read_all", "unread_notifications_count": 0},
-        )
-        return {
-            "message": "No unread notifications found",
-            "unread_notifications_count": 0,
-        }
-
-    for un in unread_notifs:
-        un.read = True
 
+def _mark_all_notifications_as_read(db: Session, current_user):
+    marked, unread_count = mark_notifications_read(db, current_user.id)
     db.commit()
 
     manager.ts_send_personal(
         current_user.id,
-        {"event": "notification.read_all", "unread_notifications_count": 0},
+        {
+            "event": "notification.read_all",
+            "unread_notifications_count": unread_count,
+        },
     )
 
+    if not marked:
+        return {
+            "message": "No unread notifications found",
+            "unread_notifications_count": unread_count,
+        }
     return {
         "message": "All notifications marked as read",
-        "unread_notifications_count": 0,
+        "unread_notifications_count": unread_count,
+    }
+
+
+@router.post("/notifications/read-all")
+async def mark_all_notifications_as_read(
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """Mark every unread notification for the current user as read."""
+    return await db.run_sync(_mark_all_notifications_as_read, current_user)
+
+
+def _mark_notifications_as_read(
+    db: Session, request: NotificationReadRequest, current_user
+):
+    marked, unread_count = mark_notifications_read(
+        db, current_user.id, list(set(request.notification_ids))
+    )
+    db.commit()
+    if marked:
+        push_unread_count(current_user.id, unread_count)
+    return {
+        "message": f"{marked} notifications marked as read",
+        "marked": marked,
+        "unread_notifications_count": unread_count,
     }
+
+
+@router.post("/notifications/read")
+async def mark_notifications_as_read(
+    request: NotificationReadRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user),
+):
+    """Mark a batch of the current user's notifications as read.
+
+    Ids that are unknown or already read are ignored.
+    """
+    return await db.run_sync(_mark_notifications_as_read, request, current_user)
@@ -1,40 +1,49 @@
-from app.database.db import get_db
+from app.auth.token import invalidate_cached_user
+from app.database.db import get_async_db
 from app.models.user import User
 from app.schemas.auth import PasswordResetCheckSchema, PasswordResetSchema
-from app.utils.password import hash_password
+from app.utils.password import hash_password_async
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import pyotp
 
 router = APIRouter()
 
 
-@router.post("/password-reset/check", tags=["auth"])
-def password_reset_check(
-    request: PasswordResetCheckSchema, db: Session = Depends(get_db)
-):
-    user = db.query(User).filter(User.username == request.username).first()
+def _get_reset_user(db: Session, username: str) -> User:
+    user = db.query(User).filter(User.username == username).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.twofa_secret:
         raise HTTPException(
             status_code=400, detail="2FA is not enabled for this account"
         )
+    return user
+
+
+def _store_password(db: Session, user: User, hashed_password: str):
+    user.password = hashed_password
+    db.commit()
+
+
+@router.post("/password-reset/check", tags=["auth"])
+async def password_reset_check(
+    request: PasswordResetCheckSchema, db: AsyncSession = Depends(get_async_db)
+):
+    await db.run_sync(_get_reset_user, request.username)
     return {"message": "User exists and 2FA is enabled"}
 
 
 @router.post("/password-reset/confirm", tags=["auth"])
-def password_reset_confirm(request: PasswordResetSchema, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == request.username).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if not user.twofa_secret:
-        raise HTTPException(
-            status_code=400, detail="2FA is not enabled for this account"
-        )
+async def password_reset_confirm(
+    request: PasswordResetSchema, db: AsyncSession = Depends(get_async_db)
+):
+    user = await db.run_sync(_get_reset_user, request.username)
     totp = pyotp.TOTP(user.twofa_secret)
     if not totp.verify(request.totp_code):
         raise HTTPException(status_code=401, detail="Invalid 2FA code")
-    user.password = hash_password(request.new_password)
-    db.commit()
+    hashed_password = await hash_password_async(request.new_password)
+    await db.run_sync(_store_password, user, hashed_password)
+    invalidate_cached_user(request.username)
     return {"message": "Password reset successfully"}
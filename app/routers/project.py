@@ -1,10 +1,8 @@
-from app.auth.token import get_current_user
-from app.database.db import get_db
+from app.auth.token import get_current_user, load_twofa
+from app.database.db import get_async_db
 from app.dependencies.permissions import require_project_member, require_project_owner
 from app.models import User
 from app.models.project import Project
-from app.models.todo import TodoStatus
-from app.models.user_notification import UserNotification
 from app.models.user_project_sorting import UserProjectSorting
 from app.schemas.project import (
     ProjectCreate,
@@ -16,26 +14,36 @@ from app.schemas.project import (
     ProjectUpdate,
     DeleteProjectRequest,
 )
-from app.utils.project import create_project, get_user_projects, update_project
+from app.utils.project import (
+    create_project,
+    get_user_projects,
+    get_user_projects_with_members,
+    update_project,
+)
+from app.utils.notification_utils import (
+    get_unread_count,
+    push_unread_count,
+    release_project_unread,
+)
 from app.utils.team_helpers import (
     build_team_members_for_owner,
     build_team_members_for_non_owner,
 )
-from app.utils.todo_utils import get_project_todos
+from app.utils.todo_utils import get_project_todo_counts
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import pyotp
-from app.websockets.connection_manager import manager
+from app.websockets.connection_manager import manager, project_topic
 
 router = APIRouter()
 
 
-@router.post("/project", response_model=ProjectResponse)
-def create_new_project(
+def _create_new_project(
+    db: Session,
     project: ProjectCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: User,
 ):
     new_project = create_project(db, name=project.name, user_id=current_user.id)
     response_data = {
@@ -50,14 +58,29 @@ def create_new_project(
         ],
     }
     message = {"event": "project.created", "project": response_data}
-    background_tasks.add_task(manager.ts_send_personal, current_user.id, message)
+    background_tasks.add_task(
+        manager.ts_publish,
+        project_topic(new_project.id),
+        message,
+        user_ids=[current_user.id],
+        subscribe=[current_user.id],
+    )
     return response_data
 
 
-@router.get("/projects", response_model=ProjectListResponse)
-def list_projects(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+@router.post("/project", response_model=ProjectResponse)
+async def create_new_project(
+    project: ProjectCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
 ):
+    return await db.run_sync(
+        _create_new_project, project, background_tasks, current_user
+    )
+
+
+def _list_projects(db: Session, current_user: User):
     projects = get_user_projects(db, current_user.id)
     project_dict = {project.id: project for project in projects}
     sorting_record = (
@@ -92,24 +115,22 @@ def list_projects(
         else:
             invited_projects.append(project_data)
 
-    global_unread_count = (
-        db.query(UserNotification)
-        .filter_by(user_id=current_user.id, read=False)
-        .count()
-    )
     return ProjectListResponse(
         my_projects=my_projects,
         invited_projects=invited_projects,
-        unread_notifications_count=global_unread_count,
+        unread_notifications_count=get_unread_count(db, current_user.id),
     )
 
 
-@router.get("/project/{project_id}", response_model=ProjectResponse)
-def get_project_by_id(
-    project: Project = Depends(require_project_member),
-    db: Session = Depends(get_db),
+@router.get("/projects", response_model=ProjectListResponse)
+async def list_projects(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
+    return await db.run_sync(_list_projects, current_user)
+
+
+def _get_project_by_id(db: Session, project: Project, current_user: User):
     members = (
         build_team_members_for_owner(project, current_user)
         if project.user_id == current_user.id
@@ -123,13 +144,21 @@ def get_project_by_id(
     return response_data
 
 
-@router.put("/project/{project_id}", response_model=ProjectResponse)
-def update_project_endpoint(
+@router.get("/project/{project_id}", response_model=ProjectResponse)
+async def get_project_by_id(
+    project: Project = Depends(require_project_member),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await db.run_sync(_get_project_by_id, project, current_user)
+
+
+def _update_project_endpoint(
+    db: Session,
     project_update: ProjectUpdate,
     background_tasks: BackgroundTasks,
-    project: Project = Depends(require_project_owner),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    project: Project,
+    current_user: User,
 ):
     updated_project = update_project(db, project, project_update.name)
     members = build_team_members_for_owner(project, current_user)
@@ -139,19 +168,32 @@ def update_project_endpoint(
         "team_members": members,
     }
     message = {"event": "project.updated", "project": response_data}
-    recipients = {project.user_id}
-    for tm in project.team_members:
-        recipients.add(tm.user_id)
-    background_tasks.add_task(manager.ts_broadcast, list(recipients), message)
+    background_tasks.add_task(manager.ts_publish, project_topic(project.id), message)
     return response_data
 
 
-@router.put("/projects/sort", response_model=ProjectSortingResponse)
-def update_project_sorting(
-    sorting_update: ProjectSortingUpdate,
+@router.put("/project/{project_id}", response_model=ProjectResponse)
+async def update_project_endpoint(
+    project_update: ProjectUpdate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    project: Project = Depends(require_project_owner),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
+):
+    return await db.run_sync(
+        _update_project_endpoint,
+        project_update,
+        background_tasks,
+        project,
+        current_user,
+    )
+
+
+def _update_project_sorting(
+    db: Session,
+    sorting_update: ProjectSortingUpdate,
+    background_tasks: BackgroundTasks,
+    current_user: User,
 ):
     sorting_record = (
         db.query(UserProjectSorting)
@@ -172,18 +214,26 @@ def update_project_sorting(
     return ProjectSortingResponse(project_ids=sorting_record.sorting)
 
 
-@router.get("/projects/statistics", response_model=ProjectStatisticsResponse)
-def get_project_statistics(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+@router.put("/projects/sort", response_model=ProjectSortingResponse)
+async def update_project_sorting(
+    sorting_update: ProjectSortingUpdate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
 ):
-    projects = get_user_projects(db, current_user.id)
+    return await db.run_sync(
+        _update_project_sorting, sorting_update, background_tasks, current_user
+    )
+
+
+def _get_project_statistics(db: Session, current_user: User):
+    projects = get_user_projects_with_members(db, current_user.id)
+    todo_counts = get_project_todo_counts(db, [project.id for project in projects])
     my_projects = []
     invited_projects = []
     for project in projects:
-        todos = get_project_todos(db, project.id)
-        total_tasks = len(todos)
-        open_tasks = len([t for t in todos if t.status != TodoStatus.DONE])
-        done_tasks = len([t for t in todos if t.status == TodoStatus.DONE])
+        total_tasks, done_tasks = todo_counts.get(project.id, (0, 0))
+        open_tasks = total_tasks - done_tasks
         percentage = (done_tasks / total_tasks) * 100 if total_tasks > 0 else 0.0
 
         if project.user_id == current_user.id:
@@ -211,14 +261,22 @@ def get_project_statistics(
     return {"my_projects": my_projects, "invited_projects": invited_projects}
 
 
-@router.delete("/project/{project_id}")
-def delete_project(
+@router.get("/projects/statistics", response_model=ProjectStatisticsResponse)
+async def get_project_statistics(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await db.run_sync(_get_project_statistics, current_user)
+
+
+def _delete_project(
+    db: Session,
     request_body: DeleteProjectRequest,
     background_tasks: BackgroundTasks,
-    project: Project = Depends(require_project_owner),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    project: Project,
+    current_user: User,
 ):
+    load_twofa(db, current_user)
     if current_user.twofa_secret:
         if not request_body.totp_code:
             raise HTTPException(
@@ -246,6 +304,7 @@ def delete_project(
     for invite in invites:
         db.delete(invite)
 
+    unread_counts = release_project_unread(db, project.id)
     notifications = (
         db.query(Notification).filter(Notification.project_id == project.id).all()
     )
@@ -261,9 +320,23 @@ def delete_project(
 
     db.delete(project)
     db.commit()
-    recipients = {project.user_id}
-    for tm in project.team_members:
-        recipients.add(tm.user_id)
+    for user_id, unread_count in unread_counts.items():
+        push_unread_count(user_id, unread_count)
     message = {"event": "project.deleted", "project_id": project.id}
-    background_tasks.add_task(manager.ts_broadcast, list(recipients), message)
+    background_tasks.add_task(
+        manager.ts_publish, project_topic(project.id), message, close_topic=True
+    )
     return {"message": "Project deleted successfully"}
+
+
+@router.delete("/project/{project_id}")
+async def delete_project(
+    request_body: DeleteProjectRequest,
+    background_tasks: BackgroundTasks,
+    project: Project = Depends(require_project_owner),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(
+        _delete_project, request_body, background_tasks, project, current_user
+    )
@@ -1,9 +1,10 @@
 from app.auth.token import create_token
-from app.database.db import get_db
+from app.database.db import get_async_db
 from app.models import User
 from app.schemas.auth import RegisterSchema
-from app.utils.password import hash_password
+from app.utils.password import hash_password_async
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import uuid4
 import random
@@ -11,29 +12,37 @@ import random
 router = APIRouter()
 
 
+def _username_taken(db: Session, username: str) -> bool:
+    return db.query(User).filter(User.username == username).first() is not None
+
+
+def _add_user(db: Session, new_user: User):
+    try:
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+    except Exception:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Failed to register user")
+
+
 @router.post("/register", status_code=201)
-async def register(auth: RegisterSchema, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.username == auth.username).first():
+async def register(auth: RegisterSchema, db: AsyncSession = Depends(get_async_db)):
+    if await db.run_sync(_username_taken, auth.username):
         raise HTTPException(status_code=400, detail="Username already taken")
     avatar_id = random.randint(1, 20)
     new_user = User(
         id=str(uuid4()),
         username=auth.username,
-        password=hash_password(auth.password),
+        password=await hash_password_async(auth.password),
         avatar_id=avatar_id,
     )
     access_token = create_token(data={"sub": new_user.username})
-    try:
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        return {
-            "message": "You have successfully registered",
-            "token_type": "bearer",
-            "access_token": access_token,
-            "username": new_user.username,
-            "avatar_id": new_user.avatar_id,
-        }
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail="Failed to register user")
+    await db.run_sync(_add_user, new_user)
+    return {
+        "message": "You have successfully registered",
+        "token_type": "bearer",
+        "access_token": access_token,
+        "username": new_user.username,
+        "avatar_id": new_user.avatar_id,
+    }
@@ -1,5 +1,5 @@
 from app.auth.token import get_current_user
-from app.database.db import get_db
+from app.database.db import get_async_db
 from app.dependencies.permissions import require_project_member, require_project_owner
 from app.models.project import Project
 from app.models.team import Team
@@ -9,18 +9,15 @@ from app.utils.notification_utils import (
     create_project_notification,
 )
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.websockets.connection_manager import manager
+from app.websockets.connection_manager import manager, project_topic
 
 router = APIRouter()
 
 
-@router.post("/project/{project_id}/leave", response_model=dict)
-def leave_project(
-    background_tasks: BackgroundTasks,
-    project: Project = Depends(require_project_member),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+def _leave_project(
+    db: Session, background_tasks: BackgroundTasks, project: Project, current_user: User
 ):
     if project.user_id == current_user.id:
         raise HTTPException(
@@ -52,9 +49,6 @@ def leave_project(
         title=title_personal,
         description=description_personal,
     )
-    recipients = {project.user_id}
-    for tm in project.team_members:
-        recipients.add(tm.user_id)
     message = {
         "event": "team.member_left",
         "project_id": project.id,
@@ -65,17 +59,31 @@ def leave_project(
             "avatar_id": current_user.avatar_id,
         },
     }
-    background_tasks.add_task(manager.ts_broadcast, list(recipients), message)
+    background_tasks.add_task(
+        manager.ts_publish,
+        project_topic(project.id),
+        message,
+        unsubscribe=[current_user.id],
+    )
     return {"message": "Left project successfully"}
 
 
-@router.delete("/project/{project_id}/team/{member_id}", response_model=dict)
-def delete_team_member(
-    member_id: str,
+@router.post("/project/{project_id}/leave", response_model=dict)
+async def leave_project(
     background_tasks: BackgroundTasks,
-    project: Project = Depends(require_project_owner),
-    db: Session = Depends(get_db),
+    project: Project = Depends(require_project_member),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
+):
+    return await db.run_sync(_leave_project, background_tasks, project, current_user)
+
+
+def _delete_team_member(
+    db: Session,
+    member_id: str,
+    background_tasks: BackgroundTasks,
+    project: Project,
+    current_user: User,
 ):
     if member_id == project.user_id:
         raise HTTPException(status_code=400, detail="Cannot remove the project owner")
@@ -101,10 +109,6 @@ def delete_team_member(
         db, title=title, description=description, project_id=project.id
     )
 
-    recipients = {project.user_id}
-    for tm in project.team_members:
-        recipients.add(tm.user_id)
-    recipients.add(member_id)
     message = {
         "event": "team.member_left",
         "project_id": project.id,
@@ -115,6 +119,25 @@ def delete_team_member(
             "avatar_id": removed_user.avatar_id,
         },
     }
-    background_tasks.add_task(manager.ts_broadcast, list(recipients), message)
+    background_tasks.add_task(
+        manager.ts_publish,
+        project_topic(project.id),
+        message,
+        user_ids=[member_id],
+        unsubscribe=[member_id],
+    )
 
     return {"message": "Team member removed successfully"}
+
+
+@router.delete("/project/{project_id}/team/{member_id}", response_model=dict)
+async def delete_team_member(
+    member_id: str,
+    background_tasks: BackgroundTasks,
+    project: Project = Depends(require_project_owner),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await db.run_sync(
+        _delete_team_member, member_id, background_tasks, project, current_user
+    )
@@ -1,22 +1,32 @@
 from app.auth.token import get_current_user
-from app.database.db import get_db
-from app.dependencies.permissions import require_project_member, require_todo_permission
+from app.database.db import get_async_db
+from app.dependencies.permissions import (
+    check_project_member,
+    require_project_member,
+    require_todo_permission,
+)
 from app.models import Todo, Project
 from app.models.user import User
 from app.schemas.todo import (
     TodoCreate,
+    TodoListQuery,
     TodoListResponse,
     TodoResponse,
     TodoUpdateSchema,
 )
-from app.utils.todo_utils import create_todo, update_todo, parse_and_get_assignee
-from fastapi import APIRouter, Depends, Query, BackgroundTasks
+from app.utils.todo_utils import (
+    create_todo,
+    update_todo,
+    parse_and_get_assignee,
+    list_todos,
+    serialize_todo_listing,
+    todo_listing_cursor,
+)
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import case, asc, desc
-from sqlalchemy.sql.expression import nullslast
-from app.models.todo import TodoPriority
 from app.utils.project import get_user_projects
-from app.websockets.connection_manager import manager
+from app.websockets.connection_manager import manager, project_topic
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,119 +34,94 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.get("/todos", response_model=TodoListResponse)
-def get_all_todos(
-    assigned_only: bool = Query(False, description="Return only todos assigned to the current user"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    projects = get_user_projects(db, current_user.id)
-    project_ids = [project.id for project in projects]
+DEFAULT_PAGE_SIZE = 100
+
+
+def _list_todos_page(
+    db: Session,
+    project_ids: list[str],
+    assigned_user_id: str | None,
+    filters: TodoListQuery,
+) -> dict:
+    limit = filters.limit
+    if limit is None and filters.cursor:
+        limit = DEFAULT_PAGE_SIZE
+    try:
+        todos = list_todos(
+            db,
+            project_ids,
+            assigned_user_id=assigned_user_id,
+            assignee_id=filters.assignee_id,
+            status=filters.status,
+            priority=filters.priority,
+            due_from=filters.due_from,
+            due_to=filters.due_to,
+            cursor=filters.cursor,
+            limit=limit + 1 if limit is not None else None,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    next_cursor = None
+    if limit is not None and len(todos) > limit:
+        todos = todos[:limit]
+        next_cursor = todo_listing_cursor(todos[-1])
+    return {
+        "todos": [serialize_todo_listing(todo) for todo in todos],
+        "next_cursor": next_cursor,
+    }
 
-    order_priority = case(
-        (Todo.priority == TodoPriority.HIGH, 1),
-        (Todo.priority == TodoPriority.MEDIUM, 2),
-        (Todo.priority == TodoPriority.LOW, 3),
-        else_=4,
-    )
 
-    query = db.query(Todo).filter(Todo.project_id.in_(project_ids))
+def _list_user_todos(
+    db: Session,
+    user_id: str,
+    assigned_user_id: str | None,
+    filters: TodoListQuery,
+) -> dict:
+    projects = get_user_projects(db, user_id)
+    project_ids = [project.id for project in projects]
 
-    if assigned_only:
-        query = query.filter(Todo.assigned_user_id == current_user.id)
+    return _list_todos_page(db, project_ids, assigned_user_id, filters)
 
-    order_assigned = case((Todo.assigned_user_id.isnot(None), 0), else_=1)
 
-    todos = (
-        query.order_by(order_priority, order_assigned, nullslast(asc(Todo.due_date)), desc(Todo.updated_at)).all()
+@router.get("/todos", response_model=TodoListResponse)
+async def get_all_todos(
+    assigned_only: bool = Query(False, description="Return only todos assigned to the current user"),
+    filters: TodoListQuery = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    return await db.run_sync(
+        _list_user_todos,
+        current_user.id,
+        current_user.id if assigned_only else None,
+        filters,
     )
 
-    todos_response = []
-    for todo in todos:
-        creator = todo.user
-        assignee = todo.assignee
-        todos_response.append(
-            {
-                "id": todo.id,
-                "title": todo.title,
-                "description": todo.description,
-                "status": todo.status,
-                "priority": todo.priority,
-                "due_date": todo.due_date,
-                "created_at": todo.created_at,
-                "updated_at": todo.updated_at,
-                "finished_at": todo.finished_at,
-                "username": creator.username,
-                "avatar_id": creator.avatar_id,
-                "project_id": todo.project_id,
-                "assigned_user_id": todo.assigned_user_id,
-                "assignee_username": assignee.username if assignee else None,
-                "assignee_avatar_id": assignee.avatar_id if assignee else None,
-            }
-        )
-
-    return {"todos": todos_response}
-
 
 @router.get("/todos/{project_id}", response_model=TodoListResponse)
-def get_todos(
+async def get_todos(
     assigned_only: bool = Query(False, description="Return only todos assigned to the current user"),
+    filters: TodoListQuery = Depends(),
     project: Project = Depends(require_project_member),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    order_priority = case(
-        (Todo.priority == TodoPriority.HIGH, 1),
-        (Todo.priority == TodoPriority.MEDIUM, 2),
-        (Todo.priority == TodoPriority.LOW, 3),
-        else_=4,
-    )
-
-    query = db.query(Todo).filter(Todo.project_id == project.id)
-    if assigned_only:
-        query = query.filter(Todo.assigned_user_id == current_user.id)
-
-    order_assigned = case((Todo.assigned_user_id.isnot(None), 0), else_=1)
-
-    todos = (
-        query.order_by(order_priority, order_assigned, nullslast(asc(Todo.due_date)), desc(Todo.updated_at)).all()
+    return await db.run_sync(
+        _list_todos_page,
+        [project.id],
+        current_user.id if assigned_only else None,
+        filters,
     )
 
-    todos_response = []
-    for todo in todos:
-        creator = todo.user
-        assignee = todo.assignee
-        todos_response.append(
-            {
-                "id": todo.id,
-                "title": todo.title,
-                "description": todo.description,
-                "status": todo.status,
-                "priority": todo.priority,
-                "due_date": todo.due_date,
-                "created_at": todo.created_at,
-                "updated_at": todo.updated_at,
-                "finished_at": todo.finished_at,
-                "username": creator.username,
-                "avatar_id": creator.avatar_id,
-                "project_id": todo.project_id,
-                "assigned_user_id": todo.assigned_user_id,
-                "assignee_username": assignee.username if assignee else None,
-                "assignee_avatar_id": assignee.avatar_id if assignee else None,
-            }
-        )
-
-    return {"todos": todos_response}
-
 
-@router.post("/todo", response_model=TodoResponse)
-def create_todo_endpoint(
+def _create_todo(
+    db: Session,
     todo: TodoCreate,
+    current_user: User,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    project = require_project_member(todo.project_id, db=db, current_user=current_user)
+) -> TodoResponse:
+    project = check_project_member(db, todo.project_id, current_user)
 
     todo_data = todo.dict()
     cleaned_title, parsed_assignee_id = parse_and_get_assignee(
@@ -149,12 +134,6 @@ def create_todo_endpoint(
 
     new_todo = create_todo(db, todo_data, current_user.id)
 
-    recipients = {project.user_id}
-    for tm in project.team_members:
-        recipients.add(tm.user_id)
-    if new_todo.assigned_user_id:
-        recipients.add(new_todo.assigned_user_id)
-
     message = {
         "event": "todo.created",
         "todo": {
@@ -173,18 +152,32 @@ def create_todo_endpoint(
             "assignee_avatar_id": new_todo.assignee.avatar_id if new_todo.assignee else None,
         },
     }
-    logger.info("Broadcasting 'todo.created' for todo_id %s to recipients %s", new_todo.id, list(recipients))
-    background_tasks.add_task(manager.ts_broadcast, list(recipients), message)
-    return new_todo
+    logger.info("Broadcasting 'todo.created' for todo_id %s to project %s", new_todo.id, project.id)
+    background_tasks.add_task(
+        manager.ts_publish,
+        project_topic(project.id),
+        message,
+        user_ids=[new_todo.assigned_user_id],
+    )
+    return TodoResponse.model_validate(new_todo)
 
 
-@router.put("/todo/{todo_id}", response_model=TodoResponse)
-def update_todo_endpoint(
-    todo_update: TodoUpdateSchema,
+@router.post("/todo", response_model=TodoResponse)
+async def create_todo_endpoint(
+    todo: TodoCreate,
     background_tasks: BackgroundTasks,
-    todo: Todo = Depends(require_todo_permission),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
 ):
+    return await db.run_sync(_create_todo, todo, current_user, background_tasks)
+
+
+def _update_todo(
+    db: Session,
+    todo: Todo,
+    todo_update: TodoUpdateSchema,
+    background_tasks: BackgroundTasks,
+) -> TodoResponse:
     update_data = todo_update.dict(exclude_unset=True)
 
     if "title" in update_data:
@@ -198,13 +191,6 @@ def update_todo_endpoint(
 
     updated_todo = update_todo(db, todo, update_data)
 
-    project = db.query(Project).filter(Project.id == updated_todo.project_id).first()
-    recipients = {project.user_id}
-    for tm in project.team_members:
-        recipients.add(tm.user_id)
-    if updated_todo.assigned_user_id:
-        recipients.add(updated_todo.assigned_user_id)
-
     message = {
         "event": "todo.updated",
         "todo": {
@@ -223,30 +209,46 @@ def update_todo_endpoint(
             "assignee_avatar_id": updated_todo.assignee.avatar_id if updated_todo.assignee else None,
         },
     }
-    logger.info("Broadcasting 'todo.updated' for todo_id %s to recipients %s", updated_todo.id, list(recipients))
-    background_tasks.add_task(manager.ts_broadcast, list(recipients), message)
-    return updated_todo
+    logger.info("Broadcasting 'todo.updated' for todo_id %s to project %s", updated_todo.id, updated_todo.project_id)
+    background_tasks.add_task(
+        manager.ts_publish,
+        project_topic(updated_todo.project_id),
+        message,
+        user_ids=[updated_todo.assigned_user_id],
+    )
+    return TodoResponse.model_validate(updated_todo)
 
 
-@router.delete("/todo/{todo_id}")
-def delete_todo_endpoint(
+@router.put("/todo/{todo_id}", response_model=TodoResponse)
+async def update_todo_endpoint(
+    todo_update: TodoUpdateSchema,
     background_tasks: BackgroundTasks,
     todo: Todo = Depends(require_todo_permission),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    return await db.run_sync(_update_todo, todo, todo_update, background_tasks)
+
+
+def _delete_todo(db: Session, todo: Todo, background_tasks: BackgroundTasks):
     db.delete(todo)
     db.commit()
 
-    project = db.query(Project).filter(Project.id == todo.project_id).first()
-    recipients = {project.user_id}
-    for tm in project.team_members:
-        recipients.add(tm.user_id)
-
     message = {
         "event": "todo.deleted",
         "todo_id": todo.id,
         "project_id": todo.project_id,
     }
-    logger.info("Broadcasting 'todo.deleted' for todo_id %s to recipients %s", todo.id, list(recipients))
-    background_tasks.add_task(manager.ts_broadcast, list(recipients), message)
+    logger.info("Broadcasting 'todo.deleted' for todo_id %s to project %s", todo.id, todo.project_id)
+    background_tasks.add_task(
+        manager.ts_publish, project_topic(todo.project_id), message
+    )
+
+
+@router.delete("/todo/{todo_id}")
+async def delete_todo_endpoint(
+    background_tasks: BackgroundTasks,
+    todo: Todo = Depends(require_todo_permission),
+    db: AsyncSession = Depends(get_async_db),
+):
+    await db.run_sync(_delete_todo, todo, background_tasks)
     return {"message": "Todo deleted successfully"}
@@ -1,18 +1,17 @@
-from app.auth.token import get_current_user
-from app.database.db import get_db
+from app.auth.token import get_current_user, invalidate_cached_user, load_twofa
+from app.database.db import get_async_db
 from app.models.user import User
 from app.schemas.auth import TwoFARequest, TwoFASetupResponse
 from fastapi import APIRouter, Depends, HTTPException
 import pyotp
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 router = APIRouter()
 
 
-@router.get("/2fa/setup", response_model=TwoFASetupResponse, tags=["2FA"])
-def twofa_setup(
-    current_user: User = Depends(get_current_user), db: Session = Depends(get_db)
-):
+def _twofa_setup(db: Session, current_user: User):
+    load_twofa(db, current_user)
     if current_user.twofa_secret is not None:
         raise HTTPException(status_code=400, detail="2FA is already enabled")
     secret = pyotp.random_base32()
@@ -22,15 +21,20 @@ def twofa_setup(
     )
     current_user.pending_twofa_secret = secret
     db.commit()
+    invalidate_cached_user(current_user.username)
     return TwoFASetupResponse(secret=secret, provisioning_uri=provisioning_uri)
 
 
-@router.post("/2fa/enable", tags=["2FA"])
-def twofa_enable(
-    request: TwoFARequest,
+@router.get("/2fa/setup", response_model=TwoFASetupResponse, tags=["2FA"])
+async def twofa_setup(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    return await db.run_sync(_twofa_setup, current_user)
+
+
+def _twofa_enable(db: Session, request: TwoFARequest, current_user: User):
+    load_twofa(db, current_user)
     if current_user.twofa_secret is not None:
         raise HTTPException(status_code=400, detail="2FA is already enabled")
     if not current_user.pending_twofa_secret:
@@ -41,15 +45,21 @@ def twofa_enable(
     current_user.twofa_secret = current_user.pending_twofa_secret
     current_user.pending_twofa_secret = None
     db.commit()
+    invalidate_cached_user(current_user.username)
     return {"message": "2FA enabled successfully"}
 
 
-@router.post("/2fa/disable", tags=["2FA"])
-def twofa_disable(
+@router.post("/2fa/enable", tags=["2FA"])
+async def twofa_enable(
     request: TwoFARequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    return await db.run_sync(_twofa_enable, request, current_user)
+
+
+def _twofa_disable(db: Session, request: TwoFARequest, current_user: User):
+    load_twofa(db, current_user)
     if not current_user.twofa_secret:
         raise HTTPException(status_code=400, detail="2FA is not enabled")
     totp = pyotp.TOTP(current_user.twofa_secret)
@@ -58,15 +68,30 @@ def twofa_disable(
     current_user.twofa_secret = None
     current_user.pending_twofa_secret = None
     db.commit()
+    invalidate_cached_user(current_user.username)
     return {"message": "2FA disabled successfully"}
 
 
-@router.get("/2fa/status", tags=["2FA"])
-def twofa_status(
+@router.post("/2fa/disable", tags=["2FA"])
+async def twofa_disable(
+    request: TwoFARequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    return await db.run_sync(_twofa_disable, request, current_user)
+
+
+def _twofa_status(db: Session, current_user: User):
+    load_twofa(db, current_user)
     return {
         "enabled": current_user.twofa_secret is not None,
         "setup_pending": current_user.pending_twofa_secret is not None,
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/2fa/status", tags=["2FA"])
+async def twofa_status(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await db.run_sync(_twofa_status, current_user)
\ No newline at end of file
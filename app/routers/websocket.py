@@ -1,14 +1,38 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.auth.token import verify_token
-from app.database.db import SessionLocal
-from app.models.user import User
-from app.websockets.connection_manager import manager
+from fastapi import APIRouter, WebSocket
+from sqlalchemy.orm import Session
+from app.auth.token import load_user_by_username, verify_token
+from app.database.db import run_in_session
+from app.utils.project import get_user_project_ids
+from app.websockets.connection_manager import manager, project_topic
 
 router = APIRouter()
 
 
+def _load_socket_user(db: Session, username: str):
+    """Return ``(user_id, topics)`` for ``username``, or None if unknown."""
+    user = load_user_by_username(db, username)
+    if user is None:
+        return None
+    topics = [project_topic(pid) for pid in get_user_project_ids(db, user.id)]
+    return user.id, topics
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """Real-time events for the user of ``?token=<jwt>``.
+
+    Query parameters:
+
+    ``token``      access token; the socket is closed with 1008 without a valid one
+    ``encoding``   ``msgpack`` for binary MessagePack frames, otherwise JSON text
+    ``since``      the last ``seq`` the client received, to resume after a reconnect
+    ``epoch``      the ``epoch`` of the hello frame ``since`` belongs to
+
+    The first frame is ``{"event": "hello", "epoch": ..., "seq": ...}``. To
+    resume, a client remembers ``hello.epoch`` and the ``seq`` of the last
+    frame it handled and sends both back. Missed frames are then replayed,
+    or ``{"event": "resync"}`` tells it to reload its state over HTTP.
+    """
     token = websocket.query_params.get("token")
     if token is None:
         await websocket.close(code=1008)
@@ -24,18 +48,31 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.close(code=1008)
         return
 
-    db = SessionLocal()
+    # The session is closed before the socket is accepted, so open sockets
+    # never hold database connections.
+    found = await run_in_session(_load_socket_user, username)
+    if found is None:
+        await websocket.close(code=1008)
+        return
+    user_id, topics = found
+
+    since = websocket.query_params.get("since")
+    connected = await manager.connect(
+        user_id,
+        websocket,
+        topics,
+        since=int(since) if since and since.isdigit() else None,
+        epoch=websocket.query_params.get("epoch"),
+        encoding=websocket.query_params.get("encoding"),
+    )
+    if not connected:
+        return
     try:
-        user = db.query(User).filter(User.username == username).first()
-        if user is None:
-            await websocket.close(code=1008)
-            return
-
-        await manager.connect(user.id, websocket)
-        try:
-            while True:
-                await websocket.receive_text()
-        except WebSocketDisconnect:
-            manager.disconnect(user.id, websocket)
+        # Any text or binary message counts as a sign of life.
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            manager.touch(user_id, websocket)
     finally:
-        db.close() 
\ No newline at end of file
+        manager.disconnect(user_id, websocket)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 
 
@@ -13,3 +13,21 @@ class NotificationResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class NotificationFeedQuery(BaseModel):
+    unread_only: bool = False
+    limit: int = Field(50, ge=1, le=200, description="Page size")
+    cursor: Optional[str] = Field(
+        None, description="Opaque cursor taken from a previous page's next_cursor"
+    )
+
+
+class NotificationFeedResponse(BaseModel):
+    notifications: list[NotificationResponse]
+    next_cursor: Optional[str] = None
+    unread_notifications_count: int
+
+
+class NotificationReadRequest(BaseModel):
+    notification_ids: list[str] = Field(..., min_length=1, max_length=1000)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 from app.models.todo import TodoPriority, TodoStatus
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic import field_validator
 
 
@@ -63,6 +63,21 @@ class TodoGetResponse(BaseModel):
 
 class TodoListResponse(BaseModel):
     todos: list[TodoGetResponse]
+    next_cursor: Optional[str] = None
+
+
+class TodoListQuery(BaseModel):
+    status: Optional[TodoStatus] = None
+    priority: Optional[TodoPriority] = None
+    assignee_id: Optional[str] = None
+    due_from: Optional[datetime] = None
+    due_to: Optional[datetime] = None
+    limit: Optional[int] = Field(
+        None, ge=1, le=500, description="Page size; enables cursor pagination"
+    )
+    cursor: Optional[str] = Field(
+        None, description="Opaque cursor taken from a previous page's next_cursor"
+    )
 
 
 class TodoUpdateSchema(BaseModel):
@@ -1,83 +1,260 @@
 from app.models.notification import Notification
+from app.models.project import Project
+from app.models.team import Team
+from app.models.user import User
 from app.models.user_notification import UserNotification
+from app.schemas.notification import NotificationResponse
+from app.utils.pagination import decode_cursor, encode_cursor
+from datetime import datetime
+from sqlalchemy import (
+    case,
+    false,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+    union,
+    update,
+)
 from sqlalchemy.orm import Session
 import uuid
 from app.websockets.connection_manager import manager
 
 
+def get_unread_count(db: Session, user_id: str) -> int:
+    """Read the user's unread counter (a primary key lookup)."""
+    count = db.execute(
+        select(User.unread_notifications_count).where(User.id == user_id)
+    ).scalar_one_or_none()
+    return count or 0
+
+
+def _minus_clamped(column, amount):
+    """``column - amount`` but never below zero, in portable SQL."""
+    return case((column - amount < 0, 0), else_=column - amount)
+
+
+def _increment_unread(db: Session, user_ids: list[str]):
+    if user_ids:
+        db.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(unread_notifications_count=User.unread_notifications_count + 1)
+        )
+
+
+def decrement_unread(db: Session, user_id: str, count: int) -> int:
+    """Subtract ``count`` read notifications; returns the new unread count."""
+    if count <= 0:
+        return get_unread_count(db, user_id)
+    new_count = db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            unread_notifications_count=_minus_clamped(
+                User.unread_notifications_count, count
+            )
+        )
+        .returning(User.unread_notifications_count)
+    ).scalar_one_or_none()
+    return new_count or 0
+
+
+def mark_notifications_read(
+    db: Session, user_id: str, notification_ids: list[str] | None = None
+) -> tuple[int, int]:
+    """Mark the user's unread notifications read, or only ``notification_ids``.
+
+    One UPDATE flips the rows and the counter is decremented by the number
+    actually flipped. Returns ``(marked, unread_count)``; the caller commits.
+    """
+    query = update(UserNotification).where(
+        UserNotification.user_id == user_id, UserNotification.read == false()
+    )
+    if notification_ids is not None:
+        query = query.where(UserNotification.notification_id.in_(notification_ids))
+    marked = db.execute(
+        query.values(read=True).execution_options(synchronize_session=False)
+    ).rowcount
+    return marked, decrement_unread(db, user_id, marked)
+
+
+def release_project_unread(db: Session, project_id: str) -> dict[str, int]:
+    """Discount the unread notifications of a project that is being deleted.
+
+    Call before deleting its UserNotification rows; returns the new unread
+    count of every user whose count changed.
+    """
+    unread = (
+        select(UserNotification.user_id, func.count().label("unread"))
+        .join(Notification)
+        .where(Notification.project_id == project_id, UserNotification.read == false())
+        .group_by(UserNotification.user_id)
+        .subquery()
+    )
+    rows = db.execute(
+        update(User)
+        .where(User.id == unread.c.user_id)
+        .values(
+            unread_notifications_count=_minus_clamped(
+                User.unread_notifications_count, unread.c.unread
+            )
+        )
+        .returning(User.id, User.unread_notifications_count)
+    ).all()
+    return dict(rows)
+
+
+def push_unread_count(user_id: str, count: int):
+    manager.ts_send_personal(
+        user_id,
+        {"event": "notification.unread_count", "unread_notifications_count": count},
+    )
+
+
+def _insert_notification(
+    db: Session, title: str, description: str, project_id: str | None
+) -> tuple[dict, datetime]:
+    """Insert a Notification; returns its websocket payload and created_at."""
+    notification_id = str(uuid.uuid4())
+    created_at = db.execute(
+        insert(Notification)
+        .values(
+            id=notification_id,
+            title=title,
+            description=description,
+            project_id=project_id,
+        )
+        .returning(Notification.created_at)
+    ).scalar_one()
+    payload = {
+        "id": notification_id,
+        "title": title,
+        "description": description,
+        "created_at": created_at.isoformat(),
+        "project_id": project_id,
+    }
+    return payload, created_at
+
+
 def create_project_notification(
     db: Session, title: str, description: str, project_id: str
-) -> Notification:
-    notification = Notification(
-        id=str(uuid.uuid4()),
-        title=title,
-        description=description,
-        project_id=project_id,
+) -> str:
+    """Notify the owner and team members of a project; returns the notification id.
+
+    The recipients' rows are written by a single ``INSERT ... SELECT`` in
+    the same transaction as the notification, and the push goes out as one
+    broadcast, so the cost does not grow with the size of the team. Clients
+    count ``notification.new`` towards their unread badge themselves.
+    """
+    notification, created_at = _insert_notification(
+        db, title, description, project_id
     )
-    db.add(notification)
-    db.commit()
-    db.refresh(notification)
-    from app.models.project import Project
-
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if project:
-        recipients = set()
-        if project.user:
-            recipients.add(project.user.id)
-        for team in project.team_members:
-            recipients.add(team.user_id)
-        for user_id in recipients:
-            user_notification = UserNotification(
-                user_id=user_id, notification_id=notification.id, read=False
+    recipients = union(
+        select(Project.user_id.label("user_id")).where(
+            Project.id == project_id, Project.user_id.isnot(None)
+        ),
+        select(Team.user_id).where(Team.project_id == project_id),
+    ).subquery()
+    user_ids = (
+        db.execute(
+            insert(UserNotification)
+            .from_select(
+                ["user_id", "notification_id", "read", "created_at"],
+                select(
+                    recipients.c.user_id,
+                    literal(notification["id"]),
+                    false(),
+                    literal(created_at),
+                ),
             )
-            db.add(user_notification)
-            # Real-time push
-            manager.ts_send_personal(
-                user_id,
-                {
-                    "event": "notification.new",
-                    "notification": {
-                        "id": notification.id,
-                        "title": notification.title,
-                        "description": notification.description,
-                        "created_at": notification.created_at.isoformat(),
-                        "project_id": notification.project_id,
-                    },
-                },
-            )
-        db.commit()
-    return notification
+            .returning(UserNotification.user_id)
+        )
+        .scalars()
+        .all()
+    )
+    _increment_unread(db, user_ids)
+    db.commit()
+    # Real-time push
+    manager.ts_broadcast(
+        user_ids, {"event": "notification.new", "notification": notification}
+    )
+    return notification["id"]
 
 
 def create_personal_notification(
     db: Session, user_id: str, title: str, description: str
-) -> Notification:
-    notification = Notification(
-        id=str(uuid.uuid4()),
-        title=title,
-        description=description,
-        project_id=None,
+) -> str:
+    notification, created_at = _insert_notification(db, title, description, None)
+    db.execute(
+        insert(UserNotification).values(
+            user_id=user_id,
+            notification_id=notification["id"],
+            read=False,
+            created_at=created_at,
+        )
     )
-    db.add(notification)
-    db.commit()
-    db.refresh(notification)
-    user_notification = UserNotification(
-        user_id=user_id, notification_id=notification.id, read=False
-    )
-    db.add(user_notification)
+    _increment_unread(db, [user_id])
     db.commit()
     # Real-time push for personal notification
     manager.ts_send_personal(
-        user_id,
-        {
-            "event": "notification.new",
-            "notification": {
-                "id": notification.id,
-                "title": notification.title,
-                "description": notification.description,
-                "created_at": notification.created_at.isoformat(),
-                "project_id": notification.project_id,
-            },
-        },
+        user_id, {"event": "notification.new", "notification": notification}
+    )
+    return notification["id"]
+
+
+def notification_feed_cursor(notification: NotificationResponse) -> str:
+    """Build the cursor that resumes a feed right after ``notification``."""
+    return encode_cursor([notification.created_at.isoformat(), notification.id])
+
+
+def list_notifications(
+    db: Session,
+    user_id: str,
+    unread_only: bool = False,
+    cursor: str | None = None,
+    limit: int | None = None,
+) -> list[NotificationResponse]:
+    """Return the user's notifications, newest first.
+
+    Ordering, filtering and the keyset predicate over
+    ``(created_at, notification_id)`` run in SQL on the feed indexes of
+    user_notifications, and the notification columns are joined into the
+    same SELECT. Raises ``ValueError`` for a malformed cursor.
+    """
+    query = (
+        select(
+            Notification.id,
+            Notification.title,
+            Notification.description,
+            UserNotification.created_at,
+            UserNotification.read,
+            Notification.project_id,
+        )
+        .join(Notification, Notification.id == UserNotification.notification_id)
+        .where(UserNotification.user_id == user_id)
+    )
+    if unread_only:
+        query = query.where(UserNotification.read == false())
+    if cursor:
+        created_at, notification_id = decode_cursor(cursor, 2)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+            notification_id = str(notification_id)
+        except (TypeError, ValueError) as exc:
+            raise ValueError("Invalid cursor") from exc
+        query = query.where(
+            tuple_(UserNotification.created_at, UserNotification.notification_id)
+            < tuple_(created_at, notification_id)
+        )
+
+    query = query.order_by(
+        UserNotification.created_at.desc(), UserNotification.notification_id.desc()
     )
-    return notification
+    if limit is not None:
+        query = query.limit(limit)
+    return [
+        NotificationResponse.model_validate(row, from_attributes=True)
+        for row in db.execute(query)
+    ]
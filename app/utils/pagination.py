@@ -0,0 +1,24 @@
+import base64
+import json
+
+
+def encode_cursor(values: list) -> str:
+    """Pack the sort key of the last returned row into an opaque cursor."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Unpack a cursor created by ``encode_cursor``.
+
+    Raises ``ValueError`` if the cursor is malformed or does not carry
+    exactly ``size`` values.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
@@ -1,7 +1,49 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from argon2.exceptions import VerifyMismatchError
 from argon2 import PasswordHasher
+from argon2.profiles import RFC_9106_LOW_MEMORY
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
 
-hasher = PasswordHasher()
+load_dotenv()
+
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", RFC_9106_LOW_MEMORY.time_cost))
+ARGON2_MEMORY_COST = int(
+    os.getenv("ARGON2_MEMORY_COST", RFC_9106_LOW_MEMORY.memory_cost)
+)
+ARGON2_PARALLELISM = int(
+    os.getenv("ARGON2_PARALLELISM", RFC_9106_LOW_MEMORY.parallelism)
+)
+
+# Argon2 runs on its own small pool so a burst of logins cannot occupy the
+# shared threadpool or the event loop. Requests beyond the pending limit are
+# rejected with 503 instead of queueing without bound.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM,
+)
+
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+class PasswordHasherBusy(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password requests, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
 
 
 def hash_password(password: str) -> str:
@@ -13,3 +55,41 @@ def verify_password(hashed_password: str, plain_password: str) -> bool:
         return hasher.verify(hashed_password, plain_password)
     except VerifyMismatchError:
         return False
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with other parameters than the current ones."""
+    return hasher.check_needs_rehash(hashed_password)
+
+
+def _release(_future):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+async def _run_in_hash_executor(func, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            raise PasswordHasherBusy()
+        _pending += 1
+    try:
+        future = _executor.submit(func, *args)
+    except BaseException:
+        _release(None)
+        raise
+    # Released when the job ends, not when the caller stops waiting: a
+    # cancelled request leaves its hash running until it finishes.
+    future.add_done_callback(_release)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    """``hash_password`` on the bounded hashing pool; raises ``PasswordHasherBusy``."""
+    return await _run_in_hash_executor(hash_password, password)
+
+
+async def verify_password_async(hashed_password: str, plain_password: str) -> bool:
+    """``verify_password`` on the bounded hashing pool; raises ``PasswordHasherBusy``."""
+    return await _run_in_hash_executor(verify_password, hashed_password, plain_password)
@@ -0,0 +1,44 @@
+import logging
+from starlette.concurrency import run_in_threadpool
+from app.auth.token import invalidate_cached_user
+from app.database.db import SessionLocal
+from app.models.user import User
+from app.utils.password import PasswordHasherBusy, hash_password_async
+
+logger = logging.getLogger(__name__)
+
+
+def _store_rehashed_password(user_id: str, old_hash: str, new_hash: str) -> bool:
+    db = SessionLocal()
+    try:
+        # Only replace the hash we verified against, so a password reset that
+        # lands in between is never overwritten.
+        updated = (
+            db.query(User)
+            .filter(User.id == user_id, User.password == old_hash)
+            .update({User.password: new_hash}, synchronize_session=False)
+        )
+        db.commit()
+        return updated > 0
+    finally:
+        db.close()
+
+
+async def rehash_password(
+    user_id: str, username: str, old_hash: str, plain_password: str
+):
+    """Upgrade a verified password hash to the configured argon2 parameters.
+
+    Meant to run as a background task after a successful login. When the
+    hashing pool is saturated the upgrade is skipped; it is retried on the
+    user's next login.
+    """
+    try:
+        new_hash = await hash_password_async(plain_password)
+    except PasswordHasherBusy:
+        logger.info("Hashing pool busy, postponing rehash for user %s", user_id)
+        return
+
+    if await run_in_threadpool(_store_rehashed_password, user_id, old_hash, new_hash):
+        invalidate_cached_user(username)
+        logger.info("Upgraded password hash parameters for user %s", user_id)
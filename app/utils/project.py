@@ -2,7 +2,7 @@ import uuid
 from app.models.project import Project
 from app.models.team import Team
 from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 
 def create_project(db: Session, name: str, user_id: str) -> Project:
@@ -21,14 +21,32 @@ def get_project(db: Session, project_id: str) -> Project | None:
     return db.query(Project).filter(Project.id == project_id).first()
 
 
+def _user_projects_query(db: Session, user_id: str):
+    """Projects ``user_id`` owns or is a team member of."""
+    return db.query(Project).filter(
+        or_(
+            Project.user_id == user_id,
+            Project.team_members.any(Team.user_id == user_id),
+        )
+    )
+
+
 def get_user_projects(db: Session, user_id: str):
+    return _user_projects_query(db, user_id).all()
+
+
+def get_user_projects_with_members(db: Session, user_id: str):
+    """Like ``get_user_projects`` but batch-loads owners and team members.
+
+    The relationships are fetched with one ``IN`` query each instead of one
+    lazy load per project, so building member lists stays constant in
+    round trips.
+    """
     return (
-        db.query(Project)
-        .filter(
-            or_(
-                Project.user_id == user_id,
-                Project.team_members.any(Team.user_id == user_id),
-            )
+        _user_projects_query(db, user_id)
+        .options(
+            selectinload(Project.user),
+            selectinload(Project.team_members).selectinload(Team.user),
         )
         .all()
     )
@@ -39,3 +57,9 @@ def update_project(db: Session, project: Project, name: str) -> Project:
     db.commit()
     db.refresh(project)
     return project
+
+
+def get_user_project_ids(db: Session, user_id: str) -> list[str]:
+    """Ids of the projects ``user_id`` owns or is a team member of."""
+    query = _user_projects_query(db, user_id).with_entities(Project.id)
+    return [project_id for (project_id,) in query.all()]
@@ -0,0 +1,258 @@
+"""Retention for notifications: purge or archive old read ones.
+
+Read ``user_notifications`` rows older than the retention age are deleted
+in batches of at most ``batch_size`` rows, one transaction each. With an
+archive path every deleted row is first appended to that file as a JSON
+line together with its notification. Afterwards ``notifications`` rows
+from before the same cutoff that no user references any more are deleted,
+again in bounded batches.
+Unread rows are never touched, so the unread counters stay correct.
+
+    python -m app.utils.retention
+    python -m app.utils.retention --days 30 --archive /var/backups/notifications.jsonl
+
+The job can also run inside the app every
+NOTIFICATION_RETENTION_INTERVAL_SECONDS (off by default). On Postgres an
+advisory lock makes sure only one worker or CLI run works at a time.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, delete, exists, func, select, true, tuple_
+from sqlalchemy.orm import Session
+
+from app.database.db import SessionLocal, engine
+from app.models import Notification, UserNotification
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_RETENTION_DAYS = float(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+NOTIFICATION_RETENTION_BATCH_SIZE = int(
+    os.getenv("NOTIFICATION_RETENTION_BATCH_SIZE", "1000")
+)
+# Append purged rows to this JSONL file instead of only deleting them.
+NOTIFICATION_ARCHIVE_PATH = os.getenv("NOTIFICATION_ARCHIVE_PATH") or None
+# 0 leaves the in-process scheduler off.
+NOTIFICATION_RETENTION_INTERVAL_SECONDS = float(
+    os.getenv("NOTIFICATION_RETENTION_INTERVAL_SECONDS", "0")
+)
+
+# Arbitrary key for pg_try_advisory_lock, shared by every process.
+RETENTION_LOCK_KEY = 0x6E6F7469
+
+
+def _archive_rows(db: Session, rows: list, archive) -> None:
+    notification_ids = {notification_id for _user_id, notification_id, _ in rows}
+    notifications = {
+        n.id: n
+        for n in db.query(Notification).filter(Notification.id.in_(notification_ids))
+    }
+    for user_id, notification_id, created_at in rows:
+        notification = notifications.get(notification_id)
+        record = {
+            "user_id": user_id,
+            "notification_id": notification_id,
+            "created_at": created_at.isoformat(),
+            "read": True,
+            "title": notification.title if notification else None,
+            "description": notification.description if notification else None,
+            "project_id": notification.project_id if notification else None,
+        }
+        archive.write(json.dumps(record, separators=(",", ":")) + "\n")
+    archive.flush()
+    os.fsync(archive.fileno())
+
+
+def purge_read_notifications(
+    db: Session,
+    older_than: datetime,
+    batch_size: int = NOTIFICATION_RETENTION_BATCH_SIZE,
+    archive=None,
+) -> int:
+    """Delete read user_notifications created before ``older_than``.
+
+    Each batch is committed on its own. With ``archive`` (an open text file)
+    the rows are written to it before their batch is committed. Returns the
+    number of rows deleted.
+    """
+    purged = 0
+    while True:
+        batch = (
+            select(UserNotification.user_id, UserNotification.notification_id)
+            .where(
+                UserNotification.read == true(),
+                UserNotification.created_at < older_than,
+            )
+            .limit(batch_size)
+        )
+        rows = db.execute(
+            delete(UserNotification)
+            .where(
+                tuple_(UserNotification.user_id, UserNotification.notification_id).in_(
+                    batch
+                )
+            )
+            .returning(
+                UserNotification.user_id,
+                UserNotification.notification_id,
+                UserNotification.created_at,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        if not rows:
+            return purged
+        if archive is not None:
+            _archive_rows(db, rows, archive)
+        db.commit()
+        purged += len(rows)
+        if len(rows) < batch_size:
+            return purged
+
+
+def purge_orphaned_notifications(
+    db: Session,
+    older_than: datetime,
+    batch_size: int = NOTIFICATION_RETENTION_BATCH_SIZE,
+) -> int:
+    """Delete old notifications that no user_notifications row references.
+
+    Rows purged by ``purge_read_notifications`` carry their notification's
+    created_at, so newer notifications cannot have been orphaned by it and
+    are not scanned. The old ones are walked in ``(created_at, id)`` order,
+    ``batch_size`` per transaction. Returns the number of rows deleted.
+    """
+    purged = 0
+    last = None
+    while True:
+        query = select(Notification.created_at, Notification.id).where(
+            Notification.created_at < older_than
+        )
+        if last is not None:
+            query = query.where(
+                tuple_(Notification.created_at, Notification.id) > tuple_(*last)
+            )
+        rows = db.execute(
+            query.order_by(Notification.created_at, Notification.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return purged
+        last = tuple(rows[-1])
+        ids = [notification_id for _created_at, notification_id in rows]
+        referenced = exists().where(UserNotification.notification_id == Notification.id)
+        purged += db.execute(
+            delete(Notification)
+            .where(and_(Notification.id.in_(ids), ~referenced))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+
+
+def _try_lock(connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return True
+    locked = connection.execute(
+        select(func.pg_try_advisory_lock(RETENTION_LOCK_KEY))
+    ).scalar()
+    # The lock is held by the session; don't stay idle in a transaction.
+    connection.commit()
+    return locked
+
+
+def _unlock(connection):
+    if connection.dialect.name == "postgresql":
+        connection.execute(select(func.pg_advisory_unlock(RETENTION_LOCK_KEY)))
+        connection.commit()
+
+
+def run_retention(
+    days: float = NOTIFICATION_RETENTION_DAYS,
+    batch_size: int = NOTIFICATION_RETENTION_BATCH_SIZE,
+    archive_path: str | None = NOTIFICATION_ARCHIVE_PATH,
+) -> dict:
+    """Run one retention pass and report what it processed.
+
+    Returns ``{"skipped": True}`` if another process holds the retention lock.
+    """
+    older_than = datetime.utcnow() - timedelta(days=days)
+    with engine.connect() as lock_connection:
+        if not _try_lock(lock_connection):
+            return {"skipped": True}
+        try:
+            db = SessionLocal()
+            archive = open(archive_path, "a", encoding="utf-8") if archive_path else None
+            try:
+                user_notifications = purge_read_notifications(
+                    db, older_than, batch_size, archive
+                )
+                notifications = purge_orphaned_notifications(
+                    db, older_than, batch_size
+                )
+            finally:
+                db.close()
+                if archive is not None:
+                    archive.close()
+        finally:
+            _unlock(lock_connection)
+    return {
+        "skipped": False,
+        "older_than": older_than.isoformat(),
+        "user_notifications": user_notifications,
+        "notifications": notifications,
+        "archived_to": archive_path,
+    }
+
+
+async def _retention_forever(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await asyncio.to_thread(run_retention)
+            logger.info("Notification retention: %s", report)
+        except Exception:
+            logger.exception("Notification retention failed")
+
+
+def start_retention_scheduler(
+    interval: float = NOTIFICATION_RETENTION_INTERVAL_SECONDS,
+) -> asyncio.Task | None:
+    """Start the periodic retention task if an interval is configured."""
+    if interval <= 0:
+        return None
+    return asyncio.create_task(_retention_forever(interval))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--days",
+        type=float,
+        default=NOTIFICATION_RETENTION_DAYS,
+        help="purge read notifications older than this many days",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=NOTIFICATION_RETENTION_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--archive",
+        default=NOTIFICATION_ARCHIVE_PATH,
+        help="append purged rows to this JSONL file",
+    )
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+
+    report = run_retention(args.days, args.batch_size, args.archive)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
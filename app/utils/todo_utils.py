@@ -1,11 +1,14 @@
 from datetime import datetime
 from sqlalchemy.orm import Session
 import uuid
-from app.models.todo import Todo, TodoStatus
+from app.models.todo import Todo, TodoPriority, TodoStatus
 import re
 from app.models import Project
 from app.models.team import Team
+from app.utils.pagination import decode_cursor, encode_cursor
+from sqlalchemy import and_, asc, case, desc, false, func, or_
 from sqlalchemy.orm import joinedload
+from sqlalchemy.sql.expression import nullslast
 
 
 def parse_and_get_assignee(
@@ -63,6 +66,174 @@ def get_project_todos(db: Session, project_id: str):
     return db.query(Todo).filter(Todo.project_id == project_id).all()
 
 
+PRIORITY_RANK = {
+    TodoPriority.HIGH: 1,
+    TodoPriority.MEDIUM: 2,
+    TodoPriority.LOW: 3,
+}
+UNPRIORITIZED_RANK = 4
+
+
+def _listing_sort_keys():
+    order_priority = case(
+        *((Todo.priority == priority, rank) for priority, rank in PRIORITY_RANK.items()),
+        else_=UNPRIORITIZED_RANK,
+    )
+    order_assigned = case((Todo.assigned_user_id.isnot(None), 0), else_=1)
+    return order_priority, order_assigned
+
+
+def todo_listing_cursor(todo: Todo) -> str:
+    """Build the cursor that resumes a listing right after ``todo``."""
+    return encode_cursor(
+        [
+            PRIORITY_RANK.get(todo.priority, UNPRIORITIZED_RANK),
+            0 if todo.assigned_user_id is not None else 1,
+            todo.due_date.isoformat() if todo.due_date else None,
+            todo.updated_at.isoformat(),
+            todo.id,
+        ]
+    )
+
+
+def _after_cursor(cursor: str):
+    """Translate a listing cursor into a keyset predicate over the board order.
+
+    The board is sorted by priority rank, assigned flag, ``due_date`` (nulls
+    last), ``updated_at`` descending and finally ``id`` as a tie breaker, so
+    "after" is the lexicographic comparison over that tuple.
+    """
+    priority_rank, assigned_rank, due_date, updated_at, todo_id = decode_cursor(
+        cursor, 5
+    )
+    try:
+        priority_rank = int(priority_rank)
+        assigned_rank = int(assigned_rank)
+        due_date = datetime.fromisoformat(due_date) if due_date else None
+        updated_at = datetime.fromisoformat(updated_at)
+        todo_id = str(todo_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+    order_priority, order_assigned = _listing_sort_keys()
+    if due_date is None:
+        due_after = false()
+        due_equal = Todo.due_date.is_(None)
+    else:
+        due_after = or_(Todo.due_date > due_date, Todo.due_date.is_(None))
+        due_equal = Todo.due_date == due_date
+
+    same_priority = order_priority == priority_rank
+    same_assigned = and_(same_priority, order_assigned == assigned_rank)
+    same_due = and_(same_assigned, due_equal)
+    return or_(
+        order_priority > priority_rank,
+        and_(same_priority, order_assigned > assigned_rank),
+        and_(same_assigned, due_after),
+        and_(same_due, Todo.updated_at < updated_at),
+        and_(same_due, Todo.updated_at == updated_at, Todo.id > todo_id),
+    )
+
+
+def list_todos(
+    db: Session,
+    project_ids: list[str],
+    assigned_user_id: str | None = None,
+    assignee_id: str | None = None,
+    status: TodoStatus | None = None,
+    priority: TodoPriority | None = None,
+    due_from: datetime | None = None,
+    due_to: datetime | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
+) -> list[Todo]:
+    """Return the todos of ``project_ids`` in board order.
+
+    Creators and assignees are joined into the same SELECT so serializing the
+    result never triggers a lazy load per todo. All filters are applied in
+    SQL; ``cursor``/``limit`` page through the board with a keyset predicate
+    instead of an OFFSET. Raises ``ValueError`` for a malformed cursor.
+    """
+    order_priority, order_assigned = _listing_sort_keys()
+
+    query = (
+        db.query(Todo)
+        .options(joinedload(Todo.user), joinedload(Todo.assignee))
+        .filter(Todo.project_id.in_(project_ids))
+    )
+    if assigned_user_id:
+        query = query.filter(Todo.assigned_user_id == assigned_user_id)
+    if assignee_id:
+        query = query.filter(Todo.assigned_user_id == assignee_id)
+    if status is not None:
+        query = query.filter(Todo.status == status)
+    if priority is not None:
+        query = query.filter(Todo.priority == priority)
+    if due_from is not None:
+        query = query.filter(Todo.due_date >= due_from)
+    if due_to is not None:
+        query = query.filter(Todo.due_date <= due_to)
+    if cursor:
+        query = query.filter(_after_cursor(cursor))
+
+    query = query.order_by(
+        order_priority,
+        order_assigned,
+        nullslast(asc(Todo.due_date)),
+        desc(Todo.updated_at),
+        asc(Todo.id),
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def serialize_todo_listing(todo: Todo) -> dict:
+    creator = todo.user
+    assignee = todo.assignee
+    return {
+        "id": todo.id,
+        "title": todo.title,
+        "description": todo.description,
+        "status": todo.status,
+        "priority": todo.priority,
+        "due_date": todo.due_date,
+        "created_at": todo.created_at,
+        "updated_at": todo.updated_at,
+        "finished_at": todo.finished_at,
+        "username": creator.username,
+        "avatar_id": creator.avatar_id,
+        "project_id": todo.project_id,
+        "assigned_user_id": todo.assigned_user_id,
+        "assignee_username": assignee.username if assignee else None,
+        "assignee_avatar_id": assignee.avatar_id if assignee else None,
+    }
+
+
+def get_project_todo_counts(
+    db: Session, project_ids: list[str]
+) -> dict[str, tuple[int, int]]:
+    """Return ``{project_id: (total_tasks, done_tasks)}`` in one grouped query.
+
+    Projects without any todo are absent from the result.
+    """
+    if not project_ids:
+        return {}
+    rows = (
+        db.query(
+            Todo.project_id,
+            func.count(Todo.id),
+            func.coalesce(
+                func.sum(case((Todo.status == TodoStatus.DONE, 1), else_=0)), 0
+            ),
+        )
+        .filter(Todo.project_id.in_(project_ids))
+        .group_by(Todo.project_id)
+        .all()
+    )
+    return {project_id: (total, done) for project_id, total, done in rows}
+
+
 def update_todo(db: Session, todo: Todo, data: dict) -> Todo:
     for key, value in data.items():
         setattr(todo, key, value)
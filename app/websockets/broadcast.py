@@ -0,0 +1,198 @@
+"""Pub/sub backends that carry websocket messages between workers.
+
+Every worker publishes outgoing messages to the backend and delivers what it
+receives from the backend to the sockets it holds itself, so a message
+reaches a user no matter which worker their socket is attached to.
+
+``memory`` delivers within the current process only. It is the default,
+suits a single worker, and is the stand-in used by tests. ``postgres`` uses
+LISTEN/NOTIFY on the application database and works across workers and
+nodes without extra infrastructure; only it needs asyncpg.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+
+from app.database.db import ASYNC_DATABASE_URL
+
+load_dotenv()
+
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "memory").lower()
+BROADCAST_CHANNEL = os.getenv("BROADCAST_CHANNEL", "todoboard_ws")
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class BroadcastBackend:
+    """Base class: ``publish`` fans a message out to ``handler`` on every worker."""
+
+    def __init__(self, handler: Handler):
+        self.handler = handler
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, message: dict):
+        raise NotImplementedError
+
+    async def publish_many(self, messages: List[dict]):
+        """Publish ``messages`` in order; backends may send them together."""
+        for message in messages:
+            await self.publish(message)
+
+
+class MemoryBackend(BroadcastBackend):
+    async def publish(self, message: dict):
+        await self.handler(message)
+
+
+class PostgresBackend(BroadcastBackend):
+    """LISTEN/NOTIFY on ``channel`` over dedicated asyncpg connections.
+
+    NOTIFY payloads are limited to 8000 bytes, so larger messages are split
+    into chunks sent in one transaction and reassembled by the listener.
+    Messages published while the listening connection is down are lost; it
+    reconnects after ``reconnect_delay`` seconds.
+    """
+
+    # Characters per chunk; 4 bytes per character worst case plus the
+    # header stays below the NOTIFY limit.
+    CHUNK_SIZE = 1800
+    MAX_PARTIAL_MESSAGES = 256
+
+    def __init__(
+        self,
+        handler: Handler,
+        dsn: str,
+        channel: str = BROADCAST_CHANNEL,
+        reconnect_delay: float = 1.0,
+    ):
+        super().__init__(handler)
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._pool = None
+        self._listen_task: asyncio.Task | None = None
+        self._deliver_task: asyncio.Task | None = None
+        self._inbox: asyncio.Queue[str] = asyncio.Queue()
+        self._partial: Dict[str, List[str | None]] = {}
+
+    async def start(self):
+        import asyncpg
+
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=2)
+        self._deliver_task = asyncio.create_task(self._deliver_forever())
+        self._listen_task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self):
+        for task in (self._listen_task, self._deliver_task):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *(t for t in (self._listen_task, self._deliver_task) if t),
+            return_exceptions=True,
+        )
+        if self._pool is not None:
+            await self._pool.close()
+
+    async def publish(self, message: dict):
+        await self.publish_many([message])
+
+    async def publish_many(self, messages: List[dict]):
+        """Send all of ``messages`` as NOTIFYs in a single transaction."""
+        chunks = [chunk for message in messages for chunk in self._chunks(message)]
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(
+                    "SELECT pg_notify($1, $2)",
+                    [(self.channel, chunk) for chunk in chunks],
+                )
+
+    def _chunks(self, message: dict) -> List[str]:
+        payload = json.dumps(message, separators=(",", ":"))
+        if len(payload) <= self.CHUNK_SIZE:
+            return [payload]
+        message_id = uuid.uuid4().hex
+        parts = [
+            payload[i : i + self.CHUNK_SIZE]
+            for i in range(0, len(payload), self.CHUNK_SIZE)
+        ]
+        return [
+            f"{message_id}:{index}:{len(parts)}:{part}"
+            for index, part in enumerate(parts)
+        ]
+
+    async def _listen_forever(self):
+        import asyncpg
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: closed.set())
+                await conn.add_listener(self.channel, self._on_notify)
+                await closed.wait()
+                logging.warning("Broadcast listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                if conn is not None:
+                    await conn.close()
+                raise
+            except Exception:
+                logging.exception("Broadcast listener failed, reconnecting")
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str):
+        # Queue instead of spawning a task per message so delivery keeps
+        # the order in which messages were published.
+        self._inbox.put_nowait(payload)
+
+    async def _deliver_forever(self):
+        while True:
+            payload = await self._inbox.get()
+            try:
+                message = self._reassemble(payload)
+                if message is not None:
+                    await self.handler(message)
+            except Exception:
+                logging.exception("Broadcast delivery failed")
+
+    def _reassemble(self, payload: str) -> dict | None:
+        if payload.startswith("{"):
+            return json.loads(payload)
+
+        message_id, index, total, part = payload.split(":", 3)
+        parts = self._partial.get(message_id)
+        if parts is None:
+            if len(self._partial) >= self.MAX_PARTIAL_MESSAGES:
+                self._partial.pop(next(iter(self._partial)))
+            parts = self._partial[message_id] = [None] * int(total)
+        parts[int(index)] = part
+        if any(p is None for p in parts):
+            return None
+        del self._partial[message_id]
+        return json.loads("".join(parts))
+
+
+def _listen_dsn() -> str:
+    url = make_url(ASYNC_DATABASE_URL).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def create_backend(handler: Handler) -> BroadcastBackend:
+    """Build the backend selected by BROADCAST_BACKEND."""
+    if BROADCAST_BACKEND == "memory":
+        return MemoryBackend(handler)
+    if BROADCAST_BACKEND == "postgres":
+        return PostgresBackend(handler, dsn=_listen_dsn())
+    raise ValueError(f"Unknown BROADCAST_BACKEND: {BROADCAST_BACKEND!r}")
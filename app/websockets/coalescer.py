@@ -0,0 +1,72 @@
+"""Short-window coalescing of websocket events.
+
+Events delivered within WS_COALESCE_WINDOW_MS of the first pending one are
+held back and flushed together. A newer event with the same
+``coalesce_key`` (for example another ``todo.updated`` for the same todo)
+and the same recipients replaces the pending one and moves to the end, so
+a burst of edits reaches clients as its final state. A window of 0
+disables coalescing.
+"""
+
+import asyncio
+from collections import OrderedDict
+import os
+from typing import Callable, List, Tuple
+
+from dotenv import load_dotenv
+
+from app.websockets.outbound import coalesce_key
+
+load_dotenv()
+
+WS_COALESCE_WINDOW_MS = float(os.getenv("WS_COALESCE_WINDOW_MS", "50"))
+# Flush early once this many events are pending.
+WS_COALESCE_MAX_EVENTS = int(os.getenv("WS_COALESCE_MAX_EVENTS", "200"))
+
+Entry = Tuple[List[str], dict]
+
+
+class EventCoalescer:
+    def __init__(
+        self,
+        flush: Callable[[List[Entry]], None],
+        window_ms: float = WS_COALESCE_WINDOW_MS,
+        max_events: int = WS_COALESCE_MAX_EVENTS,
+    ):
+        self._flush_cb = flush
+        self.window = window_ms / 1000
+        self.max_events = max_events
+        self._pending: "OrderedDict[object, Entry]" = OrderedDict()
+        self._timer: asyncio.TimerHandle | None = None
+        self.merged = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def add(self, user_ids: List[str], data: dict):
+        key = coalesce_key(data)
+        if key is None:
+            key = object()
+        else:
+            # The window is shared by all users, and keys like
+            # ``project.sorted`` only identify the object per recipient.
+            key = (key, frozenset(user_ids))
+            if self._pending.pop(key, None) is not None:
+                self.merged += 1
+        self._pending[key] = (user_ids, data)
+
+        if len(self._pending) >= self.max_events:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        entries = list(self._pending.values())
+        self._pending.clear()
+        self._flush_cb(entries)
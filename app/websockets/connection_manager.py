@@ -1,24 +1,169 @@
-from typing import Dict, List, Set
+from typing import Dict, Iterable, List, Set
 from fastapi import WebSocket, WebSocketDisconnect
 import asyncio
+import json
 import logging
+import uuid
+
+from app.websockets.broadcast import BroadcastBackend, create_backend
+from app.websockets.coalescer import EventCoalescer
+from app.websockets.dispatch import DispatchQueue
+from app.websockets.outbound import (
+    CLOSE_GOING_AWAY,
+    CLOSE_POLICY_VIOLATION,
+    CLOSE_TRY_AGAIN_LATER,
+    WS_IDLE_TIMEOUT_SECONDS,
+    WS_MAX_CONNECTIONS_PER_USER,
+    WS_MAX_CONNECTIONS_PER_WORKER,
+    WS_PING_INTERVAL_SECONDS,
+    ClientConnection,
+    SendStats,
+    coalesce_key,
+    negotiate_encoding,
+    number_packed,
+    pack_body,
+    pack_frame,
+)
+from app.websockets.replay import WS_RESUME_GRACE_SECONDS, UserStream
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode_message(data: dict) -> str:
+    """Encode ``data`` as the JSON text of a websocket frame."""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, separators=(",", ":"))
+
+
+def project_topic(project_id: str) -> str:
+    return f"project:{project_id}"
 
 
 class ConnectionManager:
     """Keeps track of active websocket connections per user and provides helpers
     to send/broadcast JSON payloads. A global instance (`manager`) is created at
     the bottom of this file and can safely be imported anywhere in the project.
+
+    Sends go through the broadcast backend, which hands every message to the
+    manager of each worker; each manager then queues it on the sockets it
+    holds (see ``app.websockets.outbound``).
+
+    Project events are published to a ``project:{id}`` topic. Each worker
+    keeps the topic subscriptions of the users connected to it, so routers
+    do not need to know who the members are. Membership changes travel
+    through the backend with the event that caused them, keeping every
+    worker's subscriptions in step with the events it delivers.
+
+    Frames are numbered per user so a reconnecting client can resume (see
+    ``app.websockets.replay``). A user's stream and subscriptions are kept
+    for a grace period after their last socket closes.
+
+    Outgoing messages, whether from the loop or from threadpool code via the
+    ``ts_*`` helpers, pass through one dispatch queue (see
+    ``app.websockets.dispatch``) and are published in the order they were
+    sent.
     """
 
-    def __init__(self):
-        # user_id -> set of websocket connections
-        self._connections: Dict[str, Set[WebSocket]] = {}
+    def __init__(self, backend: BroadcastBackend | None = None):
+        # user_id -> websocket -> its outbound queue
+        self._connections: Dict[str, Dict[WebSocket, ClientConnection]] = {}
+        # sockets in _connections, kept in step by connect and disconnect
+        self._connection_count = 0
+        # topic -> connected subscribers, and the reverse for cleanup
+        self._topics: Dict[str, Set[str]] = {}
+        self._user_topics: Dict[str, Set[str]] = {}
+        # user_id -> numbered frames, for connected and recently left users
+        self._streams: Dict[str, UserStream] = {}
+        self.epoch = uuid.uuid4().hex[:16]
+        self.replayed = 0
+        self.resyncs = 0
+        self.rejected = 0
+        self.reaped = 0
+        self.over_user_limit = 0
+        self._heartbeat_task: asyncio.Task | None = None
+        self.idle_timeout = WS_IDLE_TIMEOUT_SECONDS
+        self.send_stats = SendStats()
+        self._coalescer = EventCoalescer(self._send_entries)
+        self._backend = backend or create_backend(self._deliver)
+        self._dispatch = DispatchQueue(self._backend.publish_many)
         try:
             self._loop = asyncio.get_running_loop()
         except RuntimeError:
             self._loop = None
 
-    async def connect(self, user_id: str, websocket: WebSocket):
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        await self._backend.start()
+        if WS_PING_INTERVAL_SECONDS > 0:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_forever())
+
+    async def stop(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+        await self._dispatch.join()
+        await self._backend.stop()
+        self._coalescer.flush()
+
+    @property
+    def connection_count(self) -> int:
+        return self._connection_count
+
+    async def _heartbeat_forever(self):
+        ping = encode_message({"event": "ping"})
+        while True:
+            await asyncio.sleep(WS_PING_INTERVAL_SECONDS)
+            try:
+                self._heartbeat(ping)
+            except Exception:
+                logging.exception("WebSocket heartbeat failed")
+
+    def _heartbeat(self, ping: str):
+        """Reap connections that went silent and ping the rest."""
+        packed_ping = None
+        for user_id, conns in list(self._connections.items()):
+            for websocket, client in list(conns.items()):
+                idle = (
+                    self.idle_timeout > 0 and client.idle_for() > self.idle_timeout
+                )
+                if client.closed or idle:
+                    self.reaped += 1
+                    client.close(CLOSE_GOING_AWAY)
+                    # A half-open peer never completes the close handshake,
+                    # so forget the socket now rather than when it ends.
+                    self.disconnect(user_id, websocket)
+                elif client.encoding == "msgpack":
+                    if packed_ping is None:
+                        packed_ping = pack_frame(ping)
+                    client.enqueue(packed_ping, force=True)
+                else:
+                    client.enqueue(ping, force=True)
+
+    def touch(self, user_id: str, websocket: WebSocket):
+        """Record that the client sent something, e.g. a pong."""
+        client = self._connections.get(user_id, {}).get(websocket)
+        if client is not None:
+            client.touch()
+
+    async def connect(
+        self,
+        user_id: str,
+        websocket: WebSocket,
+        topics: Iterable[str] = (),
+        since: int | None = None,
+        epoch: str | None = None,
+        encoding: str | None = None,
+    ):
+        """Register ``websocket`` and send the hello frame.
+
+        With ``since`` the frames the user missed are replayed, or a resync
+        frame is sent if that is not possible. ``encoding`` is the frame
+        encoding the client asked for. Returns False if the worker is full
+        and the socket was closed instead.
+        """
         if self._loop is None or not self._loop.is_running():
             try:
                 self._loop = asyncio.get_running_loop()
@@ -26,31 +171,217 @@ class ConnectionManager:
                 pass
 
         await websocket.accept()
-        self._connections.setdefault(user_id, set()).add(websocket)
+        if self.connection_count >= WS_MAX_CONNECTIONS_PER_WORKER:
+            self.rejected += 1
+            await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+            return False
+
+        conns = self._connections.setdefault(user_id, {})
+        while len(conns) >= WS_MAX_CONNECTIONS_PER_USER:
+            self.over_user_limit += 1
+            oldest_ws = next(iter(conns))
+            oldest = conns.pop(oldest_ws)
+            self._connection_count -= 1
+            oldest.close(CLOSE_POLICY_VIOLATION)
+        client = ClientConnection(
+            websocket, self.send_stats, encoding=negotiate_encoding(encoding)
+        )
+        client.start()
+        conns[websocket] = client
+        self._connection_count += 1
+
+        stream = self._streams.get(user_id)
+        resumable = stream is not None and not stream.expired()
+        if not resumable:
+            stream = self._streams[user_id] = UserStream()
+        stream.detached_until = None
+
+        topics = set(topics)
+        for topic in self._user_topics.get(user_id, set()) - topics:
+            self._unsubscribe(user_id, topic)
+        for topic in topics:
+            self._subscribe(user_id, topic)
+
+        hello = {
+            "event": "hello",
+            "epoch": self.epoch,
+            "seq": stream.seq,
+            "encoding": client.encoding,
+        }
+        client.enqueue(client.encode(encode_message(hello)), force=True)
+        if since is None:
+            return True
+        missed = stream.since(since) if resumable and epoch == self.epoch else None
+        if missed is None:
+            self.resyncs += 1
+            resync = encode_message({"event": "resync"})
+            client.enqueue(client.encode(resync), force=True)
+            return True
+        self.replayed += len(missed)
+        for text in missed:
+            client.enqueue(client.encode(text), force=True)
+        return True
 
     def disconnect(self, user_id: str, websocket: WebSocket):
         conns = self._connections.get(user_id)
         if not conns:
             return
-        conns.discard(websocket)
+        client = conns.pop(websocket, None)
+        if client is not None:
+            self._connection_count -= 1
+            client.stop()
         if not conns:
             self._connections.pop(user_id, None)
+            stream = self._streams.get(user_id)
+            if stream is not None:
+                stream.detach()
+                asyncio.get_running_loop().call_later(
+                    WS_RESUME_GRACE_SECONDS, self._expire_stream, user_id
+                )
 
-    async def _safe_send(self, ws: WebSocket, data: dict):
-        try:
-            await ws.send_json(data)
-        except Exception as exc:
-            logging.exception("WebSocket send failed", exc_info=exc)
-            await self._close_ws(ws)
+    def _expire_stream(self, user_id: str):
+        stream = self._streams.get(user_id)
+        if stream is None or not stream.expired() or user_id in self._connections:
+            return
+        del self._streams[user_id]
+        for topic in self._user_topics.pop(user_id, set()):
+            self._discard_subscriber(topic, user_id)
+
+    def _subscribe(self, user_id: str, topic: str):
+        self._topics.setdefault(topic, set()).add(user_id)
+        self._user_topics.setdefault(user_id, set()).add(topic)
+
+    def _unsubscribe(self, user_id: str, topic: str):
+        self._discard_subscriber(topic, user_id)
+        topics = self._user_topics.get(user_id)
+        if topics is not None:
+            topics.discard(topic)
+
+    def _discard_subscriber(self, topic: str, user_id: str):
+        subscribers = self._topics.get(topic)
+        if subscribers is None:
+            return
+        subscribers.discard(user_id)
+        if not subscribers:
+            del self._topics[topic]
+
+    def _close_topic(self, topic: str):
+        for user_id in self._topics.pop(topic, set()):
+            self._user_topics.get(user_id, set()).discard(topic)
+
+    async def _deliver(self, message: dict):
+        """Backend callback: queue ``message`` on the sockets of this worker.
+
+        For topic messages ``unsubscribe`` is applied before delivery and
+        ``subscribe`` / ``close_topic`` after it.
+        """
+        topic = message.get("topic")
+        if topic is not None:
+            for uid in message.get("unsubscribe", ()):
+                self._unsubscribe(uid, topic)
+
+        user_ids = {
+            uid for uid in message.get("user_ids", ()) if uid in self._streams
+        }
+        if topic is not None:
+            user_ids.update(self._topics.get(topic, ()))
+        data = message.get("data")
+        if data is not None and user_ids:
+            entry = (list(user_ids), data)
+            if self._coalescer.enabled:
+                self._coalescer.add(*entry)
+            else:
+                self._send_entries([entry])
+
+        if topic is not None:
+            for uid in message.get("subscribe", ()):
+                if uid in self._streams:
+                    self._subscribe(uid, topic)
+            if message.get("close_topic"):
+                self._close_topic(topic)
+
+    def _send_entries(self, entries):
+        """Queue ``(user_ids, data)`` entries as one frame per recipient.
+
+        Each event is encoded once. A recipient of a single event gets it as
+        is; several events are wrapped as ``{"event": "batch", "events": [...]}``.
+        Recipients with the same sequence of events share one encoded frame,
+        into which only their ``seq`` is spliced, and nothing here waits for
+        a client to read it. A frame is packed for msgpack clients at most
+        once, when the first of them needs it, and a user's sockets share
+        the numbered bytes.
+        """
+        texts: Dict[int, str] = {}
+        per_user: Dict[str, List[int]] = {}
+        for index, (user_ids, _) in enumerate(entries):
+            for uid in user_ids:
+                if uid in self._streams:
+                    per_user.setdefault(uid, []).append(index)
+
+        # indexes -> [text, coalesce key, packed body once a client needs it]
+        frames: Dict[tuple, list] = {}
+        for uid, indexes in per_user.items():
+            indexes = tuple(indexes)
+            frame = frames.get(indexes)
+            if frame is None:
+                for i in indexes:
+                    if i not in texts:
+                        texts[i] = encode_message(entries[i][1])
+                if len(indexes) == 1:
+                    i = indexes[0]
+                    frame = [texts[i], coalesce_key(entries[i][1]), None]
+                else:
+                    events = ",".join(texts[i] for i in indexes)
+                    text = '{"event":"batch","events":[' + events + "]}"
+                    frame = [text, None, None]
+                frames[indexes] = frame
+            text, key, body = frame
+            stream = self._streams[uid]
+            text = stream.append(text)
+            packed = None
+            for client in list(self._connections.get(uid, {}).values()):
+                if client.encoding != "msgpack":
+                    client.enqueue(text, key)
+                    continue
+                if packed is None:
+                    if body is None:
+                        body = frame[2] = pack_body(frame[0])
+                    packed = number_packed(body, stream.seq)
+                client.enqueue(packed, key)
+
+    def stats(self) -> dict:
+        depths = [
+            client.depth
+            for conns in self._connections.values()
+            for client in conns.values()
+        ]
+        return {
+            "users": len(self._connections),
+            "connections": len(depths),
+            "max_connections": WS_MAX_CONNECTIONS_PER_WORKER,
+            "rejected": self.rejected,
+            "reaped": self.reaped,
+            "over_user_limit": self.over_user_limit,
+            "topics": len(self._topics),
+            "streams": len(self._streams),
+            "replayed": self.replayed,
+            "resyncs": self.resyncs,
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths, default=0),
+            "coalesced_in_window": self._coalescer.merged,
+            "dispatch": self._dispatch.stats(),
+            **self.send_stats.as_dict(),
+        }
 
     async def send_personal(self, user_id: str, data: dict):
-        for ws in list(self._connections.get(user_id, [])):
-            await self._safe_send(ws, data)
+        await self.broadcast([user_id], data)
 
     async def broadcast(self, user_ids: List[str], data: dict):
-        tasks = [self.send_personal(uid, data) for uid in set(user_ids)]
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        self._enqueue(_user_message(user_ids, data))
+
+    async def publish(self, topic: str, data: dict | None = None, **kwargs):
+        """Send ``data`` to the subscribers of ``topic``; see ``_topic_message``."""
+        self._enqueue(_topic_message(topic, data, **kwargs))
 
     def _ensure_loop(self):
         if self._loop and self._loop.is_running():
@@ -61,21 +392,56 @@ class ConnectionManager:
             pass
         return self._loop
 
+    def _enqueue(self, message: dict | None):
+        if message is not None:
+            self._dispatch.put(message, self._ensure_loop())
+
+    # Thread-safe variants for code running outside the event loop.
+
     def ts_send_personal(self, user_id: str, data: dict):
-        loop = self._ensure_loop()
-        if loop and loop.is_running():
-            asyncio.run_coroutine_threadsafe(self.send_personal(user_id, data), loop)
+        self._enqueue(_user_message([user_id], data))
 
     def ts_broadcast(self, user_ids: List[str], data: dict):
-        loop = self._ensure_loop()
-        if loop and loop.is_running():
-            asyncio.run_coroutine_threadsafe(self.broadcast(user_ids, data), loop)
+        self._enqueue(_user_message(user_ids, data))
 
-    async def _close_ws(self, ws: WebSocket):
-        try:
-            await ws.close()
-        except Exception:
-            pass
+    def ts_publish(self, topic: str, data: dict | None = None, **kwargs):
+        self._enqueue(_topic_message(topic, data, **kwargs))
+
+
+def _user_message(user_ids: Iterable[str], data: dict) -> dict | None:
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return None
+    return {"user_ids": user_ids, "data": data}
+
+
+def _topic_message(
+    topic: str,
+    data: dict | None = None,
+    user_ids: Iterable[str] = (),
+    subscribe: Iterable[str] = (),
+    unsubscribe: Iterable[str] = (),
+    close_topic: bool = False,
+) -> dict:
+    """Build a message for the subscribers of ``topic`` plus ``user_ids``.
+
+    ``subscribe`` / ``unsubscribe`` change who follows the topic, and
+    ``close_topic`` drops it, on every worker.
+    """
+    message = {"topic": topic}
+    if data is not None:
+        message["data"] = data
+    for field, value in (
+        ("user_ids", user_ids),
+        ("subscribe", subscribe),
+        ("unsubscribe", unsubscribe),
+    ):
+        value = [uid for uid in set(value) if uid]
+        if value:
+            message[field] = value
+    if close_topic:
+        message["close_topic"] = True
+    return message
 
 
-manager = ConnectionManager() 
\ No newline at end of file
+manager = ConnectionManager()
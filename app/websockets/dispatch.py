@@ -0,0 +1,87 @@
+"""Ordered hand-off of outgoing websocket messages to the event loop.
+
+Routers run in the threadpool and used to schedule a coroutine per event
+with ``run_coroutine_threadsafe``, dropping the future: errors went
+unnoticed and two quick events for the same user could be published out of
+order. Instead, messages are appended to one thread-safe queue and a single
+drain task on the loop publishes them in the order they were queued. The
+loop is woken once per burst, and everything queued by the time the drain
+runs goes to the backend as one batch.
+"""
+
+import asyncio
+from collections import deque
+import logging
+import threading
+from typing import Awaitable, Callable, List
+
+
+class DispatchQueue:
+    def __init__(self, publish: Callable[[List[dict]], Awaitable[None]]):
+        self._publish = publish
+        self._queue: deque[dict] = deque()
+        self._lock = threading.Lock()
+        # True from the wake-up until the drain finds the queue empty
+        self._scheduled = False
+        self._task: asyncio.Task | None = None
+        self.enqueued = 0
+        self.delivered = 0
+        self.failed = 0
+        self.batches = 0
+
+    def put(self, message: dict, loop: asyncio.AbstractEventLoop) -> bool:
+        """Queue ``message`` from any thread; False if ``loop`` is not running.
+
+        Such a message is dropped, counted as failed and logged.
+        """
+        if loop is None or not loop.is_running():
+            with self._lock:
+                self.failed += 1
+            logging.warning("Event loop not running, dropped a websocket message")
+            return False
+        with self._lock:
+            self._queue.append(message)
+            self.enqueued += 1
+            if self._scheduled:
+                return True
+            self._scheduled = True
+        loop.call_soon_threadsafe(self._start)
+        return True
+
+    def _start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._scheduled = False
+                    return
+                batch = list(self._queue)
+                self._queue.clear()
+            self.batches += 1
+            try:
+                await self._publish(batch)
+                self.delivered += len(batch)
+            except Exception:
+                self.failed += len(batch)
+                logging.exception("Publishing %d websocket messages failed", len(batch))
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    async def join(self):
+        """Wait until everything queued so far has been published."""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "batches": self.batches,
+            "pending": self.depth,
+        }
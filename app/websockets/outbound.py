@@ -0,0 +1,297 @@
+"""Per-connection outbound queues for websocket clients.
+
+Delivery only appends a frame to each recipient's queue; a writer task per
+connection drains it. A slow client therefore delays nobody but itself, and
+once its queue reaches the high-water mark WS_SLOW_CONSUMER_POLICY decides
+what happens:
+
+``drop``        discard the oldest queued frame
+``coalesce``    supersede a queued frame describing the same object, else drop
+``disconnect``  close the socket with 1013 so the client reconnects
+
+Dead peers are detected by uvicorn's protocol-level pings
+(``--ws-ping-interval`` / ``--ws-ping-timeout``), which browsers answer on
+their own. The server also sends ``{"event": "ping"}`` every
+WS_PING_INTERVAL_SECONDS, which clients may ignore. Only when
+WS_IDLE_TIMEOUT_SECONDS is set, for clients that answer with any message
+(``{"event": "pong"}``), is a connection that has sent nothing for that
+long treated as dead and reaped.
+
+Frames are JSON text unless the client connects with ``?encoding=msgpack``,
+in which case each frame is the same object packed as a MessagePack binary
+message. Queue entries are the finished text or bytes; the manager packs a
+frame once for all its msgpack recipients. The hello frame reports the
+encoding in effect, which stays ``json`` if msgpack is not installed.
+Compression is left to the server: uvicorn negotiates permessage-deflate
+with clients that offer it (its ``--ws-per-message-deflate`` option, on by
+default).
+"""
+
+import asyncio
+from collections import deque
+import json
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+from fastapi import WebSocket
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+load_dotenv()
+
+WS_QUEUE_HIGH_WATER = int(os.getenv("WS_QUEUE_HIGH_WATER", "256"))
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "coalesce").lower()
+# A single send that takes longer than this evicts the client.
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+WS_PING_INTERVAL_SECONDS = float(os.getenv("WS_PING_INTERVAL_SECONDS", "25"))
+# 0 disables idle reaping; existing clients never send pongs.
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "0"))
+# Opening more sockets than this closes the user's oldest one.
+WS_MAX_CONNECTIONS_PER_USER = int(os.getenv("WS_MAX_CONNECTIONS_PER_USER", "10"))
+# Beyond this a worker refuses new sockets with 1013.
+WS_MAX_CONNECTIONS_PER_WORKER = int(
+    os.getenv("WS_MAX_CONNECTIONS_PER_WORKER", "10000")
+)
+
+SLOW_CONSUMER_POLICIES = ("drop", "coalesce", "disconnect")
+if WS_SLOW_CONSUMER_POLICY not in SLOW_CONSUMER_POLICIES:
+    raise ValueError(f"Unknown WS_SLOW_CONSUMER_POLICY: {WS_SLOW_CONSUMER_POLICY!r}")
+if WS_QUEUE_HIGH_WATER < 1:
+    raise ValueError(f"WS_QUEUE_HIGH_WATER must be at least 1: {WS_QUEUE_HIGH_WATER}")
+if WS_MAX_CONNECTIONS_PER_USER < 1:
+    raise ValueError(
+        f"WS_MAX_CONNECTIONS_PER_USER must be at least 1: {WS_MAX_CONNECTIONS_PER_USER}"
+    )
+
+# Close codes
+CLOSE_GOING_AWAY = 1001
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_TRY_AGAIN_LATER = 1013
+
+
+def negotiate_encoding(requested: str | None) -> str:
+    """The frame encoding to use for a client that asked for ``requested``."""
+    if requested == "msgpack" and msgpack is not None:
+        return "msgpack"
+    return "json"
+
+
+def _loads(text: str):
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+def pack_frame(text: str) -> bytes:
+    """Re-encode a JSON text frame as MessagePack."""
+    return msgpack.packb(_loads(text))
+
+
+def pack_body(text: str) -> tuple[int, bytes]:
+    """Pack the members of a JSON object frame, without the map header.
+
+    Returns the member count and their MessagePack bytes, from which
+    ``number_packed`` builds each recipient's numbered frame.
+    """
+    data = _loads(text)
+    packer = msgpack.Packer()
+    return len(data), b"".join(
+        packer.pack(key) + packer.pack(value) for key, value in data.items()
+    )
+
+
+def number_packed(body: tuple[int, bytes], seq: int) -> bytes:
+    """``pack_frame`` of the frame numbered ``seq``, from its ``pack_body``."""
+    size, members = body
+    packer = msgpack.Packer()
+    return (
+        packer.pack_map_header(size + 1)
+        + packer.pack("seq")
+        + packer.pack(seq)
+        + members
+    )
+
+
+def coalesce_key(data: dict) -> str | None:
+    """Identify events where only the latest one matters, or None."""
+    event = data.get("event")
+    if event == "todo.updated":
+        return f"todo:{data['todo']['id']}"
+    if event == "project.updated":
+        return f"project:{data['project']['id']}"
+    if event in (
+        "project.sorted",
+        "notification.read_all",
+        "notification.unread_count",
+    ):
+        return event
+    return None
+
+
+class SendStats:
+    """Counters shared by all connections of one worker."""
+
+    def __init__(self):
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.evicted = 0
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+class ClientConnection:
+    """A websocket plus its bounded outbound queue and writer task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        stats: SendStats,
+        high_water: int = WS_QUEUE_HIGH_WATER,
+        policy: str = WS_SLOW_CONSUMER_POLICY,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+        encoding: str = "json",
+    ):
+        self.websocket = websocket
+        self.stats = stats
+        self.high_water = high_water
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.encoding = encoding
+        # Entries are [key, frame] lists, the frame being text or bytes. A
+        # superseded entry has its frame set to None and is skipped, so
+        # frames still go out in queue order.
+        self._queue: deque[list] = deque()
+        self._by_key: dict[str, list] = {}
+        self._superseded = 0
+        self._ready = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+        self._close_task: asyncio.Task | None = None
+        self.closed = False
+        self.last_seen = time.monotonic()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def idle_for(self) -> float:
+        return time.monotonic() - self.last_seen
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue) - self._superseded
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_forever())
+
+    def encode(self, text: str) -> str | bytes:
+        """A JSON text frame in this client's encoding."""
+        return pack_frame(text) if self.encoding == "msgpack" else text
+
+    def enqueue(
+        self, frame: str | bytes, key: str | None = None, force: bool = False
+    ) -> bool:
+        """Queue an encoded frame without waiting; False if the client was dropped.
+
+        ``force`` bypasses the high-water mark, for the bounded set of
+        frames sent on connect.
+        """
+        if self.closed:
+            return False
+
+        superseded = None
+        if key is not None and self.policy == "coalesce":
+            superseded = self._by_key.get(key)
+            if superseded is not None:
+                superseded[1] = None
+                self._superseded += 1
+                self.stats.coalesced += 1
+
+        if self.depth >= self.high_water and not force and superseded is None:
+            if self.policy == "disconnect":
+                logging.warning("Disconnecting slow websocket consumer")
+                self.stats.evicted += 1
+                self.close(CLOSE_TRY_AGAIN_LATER)
+                return False
+            if self._pop() is not None:
+                self.stats.dropped += 1
+
+        entry = [key, frame]
+        self._queue.append(entry)
+        if key is not None:
+            self._by_key[key] = entry
+        self.stats.enqueued += 1
+        self._ready.set()
+        return True
+
+    def _pop(self) -> list | None:
+        """Remove the oldest live entry; None if only superseded ones are left."""
+        while True:
+            if not self._queue:
+                return None
+            entry = self._queue.popleft()
+            if entry[1] is not None:
+                break
+            self._superseded -= 1
+        if entry[0] is not None and self._by_key.get(entry[0]) is entry:
+            del self._by_key[entry[0]]
+        return entry
+
+    async def _write_forever(self):
+        try:
+            while True:
+                while not self.depth:
+                    self._ready.clear()
+                    await self._ready.wait()
+                entry = self._pop()
+                if entry is None:
+                    continue
+                _, frame = entry
+                if isinstance(frame, bytes):
+                    send = self.websocket.send_bytes(frame)
+                else:
+                    send = self.websocket.send_text(frame)
+                await asyncio.wait_for(send, self.send_timeout)
+                self.stats.sent += 1
+        except asyncio.TimeoutError:
+            logging.warning("WebSocket send timed out, disconnecting client")
+            self.stats.evicted += 1
+            self.close(CLOSE_TRY_AGAIN_LATER)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logging.exception("WebSocket send failed", exc_info=exc)
+            self.close()
+
+    def close(self, code: int = 1000):
+        """Stop writing and close the socket; the receive loop then disconnects.
+
+        Also closes a connection that was already stopped.
+        """
+        if self._close_task is not None:
+            return
+        self.stop()
+        self._close_task = asyncio.create_task(self._close_ws(code))
+
+    def stop(self):
+        self.closed = True
+        self._queue.clear()
+        self._by_key.clear()
+        self._superseded = 0
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    async def _close_ws(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
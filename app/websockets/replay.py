@@ -0,0 +1,61 @@
+"""Per-user event sequence numbers and replay buffers for websocket resume.
+
+Every frame sent to a user carries ``"seq"``, increasing by one per frame
+on the worker holding the user's sockets. On connect the server sends
+``{"event": "hello", "epoch": ..., "seq": ...}``; a client that reconnects
+with ``?since=<seq>&epoch=<epoch>`` gets the frames it missed replayed,
+or ``{"event": "resync"}`` if they are no longer buffered, the epoch is
+from another worker or process, or the stream expired. Seq gaps are
+normal when a slow client's queue coalesces frames.
+
+A stream outlives its last socket by WS_RESUME_GRACE_SECONDS so a quick
+reconnect can still resume.
+"""
+
+from collections import deque
+import os
+import time
+from typing import List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WS_REPLAY_BUFFER_SIZE = int(os.getenv("WS_REPLAY_BUFFER_SIZE", "256"))
+WS_RESUME_GRACE_SECONDS = float(os.getenv("WS_RESUME_GRACE_SECONDS", "60"))
+
+
+class UserStream:
+    """The numbered frames recently sent to one user."""
+
+    def __init__(self, size: int = WS_REPLAY_BUFFER_SIZE):
+        self.seq = 0
+        self._buffer: deque[tuple[int, str]] = deque(maxlen=size)
+        # monotonic deadline once the user has no sockets left
+        self.detached_until: float | None = None
+
+    def append(self, text: str) -> str:
+        """Number a JSON object frame and remember it; returns the new text."""
+        self.seq += 1
+        text = f'{{"seq":{self.seq},' + text[1:]
+        self._buffer.append((self.seq, text))
+        return text
+
+    def since(self, seq: int) -> List[str] | None:
+        """Frames after ``seq``, or None if some were already evicted."""
+        if seq > self.seq or seq < 0:
+            return None
+        if seq == self.seq:
+            return []
+        if not self._buffer or self._buffer[0][0] > seq + 1:
+            return None
+        return [text for frame_seq, text in self._buffer if frame_seq > seq]
+
+    def detach(self, grace: float = WS_RESUME_GRACE_SECONDS):
+        self.detached_until = time.monotonic() + grace
+
+    def expired(self) -> bool:
+        return (
+            self.detached_until is not None
+            and self.detached_until <= time.monotonic()
+        )
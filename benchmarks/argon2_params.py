@@ -0,0 +1,93 @@
+"""Pick argon2 parameters that hit a target verification latency.
+
+Run this on the deployment hardware. For the given memory cost and
+parallelism it raises ``time_cost`` until the median ``verify`` latency
+would exceed the target, then prints the strongest setting that stays
+within it as environment lines for ``app/utils/password.py``.
+
+    python -m benchmarks.argon2_params --target-ms 250
+    python -m benchmarks.argon2_params --target-ms 100 --memory-cost 47104 --parallelism 1
+
+Existing hashes are upgraded on the next successful login, so changing the
+parameters never forces a password reset.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from argon2 import PasswordHasher
+from argon2.profiles import RFC_9106_LOW_MEMORY
+
+PASSWORD = "correct horse battery staple"
+
+
+def median_verify_ms(time_cost: int, memory_cost: int, parallelism: int, samples: int) -> float:
+    hasher = PasswordHasher(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+    hashed = hasher.hash(PASSWORD)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.verify(hashed, PASSWORD)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument(
+        "--memory-cost",
+        type=int,
+        default=RFC_9106_LOW_MEMORY.memory_cost,
+        help="memory cost in KiB",
+    )
+    parser.add_argument(
+        "--parallelism", type=int, default=RFC_9106_LOW_MEMORY.parallelism
+    )
+    parser.add_argument("--max-time-cost", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=7)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("PASSWORD_HASH_WORKERS", "2")),
+        help="PASSWORD_HASH_WORKERS used to estimate login throughput",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"memory_cost={args.memory_cost} KiB, parallelism={args.parallelism}, "
+        f"target={args.target_ms:.0f} ms"
+    )
+    chosen = None
+    for time_cost in range(1, args.max_time_cost + 1):
+        latency = median_verify_ms(
+            time_cost, args.memory_cost, args.parallelism, args.samples
+        )
+        print(f"  time_cost={time_cost:<3} median verify {latency:8.1f} ms")
+        if latency > args.target_ms:
+            break
+        chosen = (time_cost, latency)
+
+    if chosen is None:
+        print(
+            "\nEven time_cost=1 exceeds the target; lower --memory-cost or "
+            "--parallelism."
+        )
+        return
+
+    time_cost, latency = chosen
+    print(f"\nARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={args.memory_cost}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+    print(
+        f"\n~{latency:.0f} ms per login, about {args.workers * 1000 / latency:.0f} "
+        f"logins/s with PASSWORD_HASH_WORKERS={args.workers}."
+    )
+
+
+if __name__ == "__main__":
+    main()
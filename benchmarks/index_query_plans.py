@@ -0,0 +1,240 @@
+"""Show how the hot path indexes change query plans on a seeded dataset.
+
+Seeds a scratch database, prints the plan and the mean latency of every
+per-request lookup without any secondary index, then creates the indexes
+from ``add_hot_path_indexes`` and prints both again. Indexes the models
+declare for other purposes (the notification feed and retention) are left
+out of both runs, so they cannot back the "before" plans.
+
+    python -m benchmarks.index_query_plans
+    python -m benchmarks.index_query_plans --url postgresql+psycopg2://user:pw@localhost/scratch_db
+
+Never point ``--url`` at a database you care about: all tables are dropped.
+"""
+
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from app.database.db import Base
+from app.migrations.add_hot_path_indexes import create_indexes, drop_indexes
+from app.migrations.migration_runner import Migration  # noqa: F401 - registers table
+from app.models import (  # noqa: F401 - registers tables
+    Invite,
+    Notification,
+    Project,
+    Team,
+    Todo,
+    User,
+    UserNotification,
+)
+from app.models.todo import TodoPriority, TodoStatus
+from app.models.user_project_sorting import UserProjectSorting  # noqa: F401
+
+QUERIES = {
+    "user by username": (
+        "SELECT id FROM users WHERE username = :username",
+        lambda s: {"username": s["username"]},
+    ),
+    "projects of user": (
+        "SELECT id FROM projects WHERE user_id = :user_id OR EXISTS "
+        "(SELECT 1 FROM teams WHERE teams.project_id = projects.id "
+        "AND teams.user_id = :user_id)",
+        lambda s: {"user_id": s["user_id"]},
+    ),
+    "membership check": (
+        "SELECT id FROM teams WHERE user_id = :user_id AND project_id = :project_id",
+        lambda s: {"user_id": s["user_id"], "project_id": s["project_id"]},
+    ),
+    "team of project": (
+        "SELECT user_id FROM teams WHERE project_id = :project_id",
+        lambda s: {"project_id": s["project_id"]},
+    ),
+    "todos of project": (
+        "SELECT id FROM todos WHERE project_id = :project_id",
+        lambda s: {"project_id": s["project_id"]},
+    ),
+    "unread count": (
+        "SELECT count(*) FROM user_notifications "
+        "WHERE user_id = :user_id AND read = false",
+        lambda s: {"user_id": s["user_id"]},
+    ),
+    "notifications of project": (
+        "SELECT id FROM notifications WHERE project_id = :project_id",
+        lambda s: {"project_id": s["project_id"]},
+    ),
+    "invites of project": (
+        "SELECT id FROM invites WHERE project_id = :project_id",
+        lambda s: {"project_id": s["project_id"]},
+    ),
+}
+
+
+def _chunks(rows, size=5000):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def seed(engine, users: int, projects: int, todos: int, notifications: int):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    user_rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "username": f"user{i}",
+            "password": "x",
+            "avatar_id": 1,
+        }
+        for i in range(users)
+    ]
+    user_ids = [u["id"] for u in user_rows]
+    project_rows = [
+        {"id": str(uuid.uuid4()), "name": f"project{i}", "user_id": rng.choice(user_ids)}
+        for i in range(projects)
+    ]
+    project_ids = [p["id"] for p in project_rows]
+    team_rows = [
+        {"id": str(uuid.uuid4()), "project_id": project_id, "user_id": user_id}
+        for project_id in project_ids
+        for user_id in rng.sample(user_ids, min(5, users))
+    ]
+    todo_rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"todo{i}",
+            "status": rng.choice(list(TodoStatus)),
+            "priority": rng.choice(list(TodoPriority) + [None]),
+            "due_date": now + timedelta(days=rng.randint(0, 60)) if rng.random() < 0.5 else None,
+            "created_at": now,
+            "updated_at": now - timedelta(minutes=i),
+            "user_id": rng.choice(user_ids),
+            "project_id": rng.choice(project_ids),
+        }
+        for i in range(todos)
+    ]
+    notification_rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"notification{i}",
+            "created_at": now - timedelta(minutes=i),
+            "project_id": rng.choice(project_ids),
+        }
+        for i in range(notifications)
+    ]
+    user_notification_rows = [
+        {"user_id": user_id, "notification_id": n["id"], "read": rng.random() < 0.8}
+        for n in notification_rows
+        for user_id in rng.sample(user_ids, min(5, users))
+    ]
+    invite_rows = [
+        {"id": str(uuid.uuid4()), "project_id": project_id, "usage_count": 0, "active": True}
+        for project_id in project_ids
+    ]
+
+    with engine.begin() as connection:
+        for model, rows in (
+            (User, user_rows),
+            (Project, project_rows),
+            (Team, team_rows),
+            (Todo, todo_rows),
+            (Notification, notification_rows),
+            (UserNotification, user_notification_rows),
+            (Invite, invite_rows),
+        ):
+            for chunk in _chunks(rows):
+                connection.execute(model.__table__.insert(), chunk)
+
+    member = team_rows[0]
+    return {
+        "username": rng.choice(user_rows)["username"],
+        "user_id": member["user_id"],
+        "project_id": member["project_id"],
+    }
+
+
+def explain(connection, sql: str, params: dict) -> list[str]:
+    if connection.dialect.name == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params)
+        return [row[-1] for row in rows]
+    rows = connection.execute(text(f"EXPLAIN {sql}"), params)
+    return [row[0] for row in rows]
+
+
+def measure(connection, sql: str, params: dict, runs: int) -> float:
+    statement = text(sql)
+    start = time.perf_counter()
+    for _ in range(runs):
+        connection.execute(statement, params).fetchall()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def report(engine, sample: dict, runs: int) -> dict[str, tuple[list[str], float]]:
+    results = {}
+    with engine.connect() as connection:
+        for label, (sql, make_params) in QUERIES.items():
+            params = make_params(sample)
+            results[label] = (
+                explain(connection, sql, params),
+                measure(connection, sql, params, runs),
+            )
+    return results
+
+
+def drop_secondary_indexes(connection):
+    """Drop every index declared on the models; primary keys stay."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.drop(connection, checkfirst=True)
+    drop_indexes(connection)
+
+
+def analyze(engine):
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite://", help="scratch database URL")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--todos", type=int, default=50000)
+    parser.add_argument("--notifications", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    Base.metadata.drop_all(engine)
+    Todo.__table__.c.status.type.create(engine, checkfirst=True)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        drop_secondary_indexes(connection)
+
+    print(f"Seeding {engine.url.render_as_string(hide_password=True)} ...")
+    sample = seed(engine, args.users, args.projects, args.todos, args.notifications)
+    analyze(engine)
+    before = report(engine, sample, args.runs)
+
+    with engine.begin() as connection:
+        create_indexes(connection)
+    analyze(engine)
+    after = report(engine, sample, args.runs)
+
+    for label in QUERIES:
+        plan_before, ms_before = before[label]
+        plan_after, ms_after = after[label]
+        print(f"\n== {label}: {ms_before:.3f} ms -> {ms_after:.3f} ms")
+        print("   before:")
+        for line in plan_before:
+            print(f"     {line}")
+        print("   after:")
+        for line in plan_after:
+            print(f"     {line}")
+
+
+if __name__ == "__main__":
+    main()
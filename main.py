@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.database.db import Base, engine
@@ -13,8 +15,21 @@ from app.models import (
     user_project_sorting,
 )
 from app.routers import router
+from app.utils.retention import start_retention_scheduler
+from app.websockets.connection_manager import manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await manager.start()
+    retention_task = start_retention_scheduler()
+    yield
+    if retention_task is not None:
+        retention_task.cancel()
+    await manager.stop()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = ["https://todoboard.net", "https://www.todoboard.net"]
 
@@ -0,0 +1,108 @@
+"""Router tests against a SQLite stand-in, once per database mode.
+
+The environment is set before any ``app`` module is imported because the
+settings are read at import time. Every test that uses ``client`` runs
+with the threadpool session and again with the aiosqlite ``AsyncSession``.
+"""
+
+import os
+import shutil
+import tempfile
+import uuid
+
+# Removed again by the ``_database_dir`` fixture when the session ends.
+_DB_DIR = tempfile.mkdtemp(prefix="todoboard-tests-")
+_DB_PATH = os.path.join(_DB_DIR, "test.db")
+os.environ.update(
+    {
+        "DATABASE_URL": f"sqlite:///{_DB_PATH}",
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{_DB_PATH}",
+        "DB_ASYNC": "false",
+        "JWT_SECRET_KEY": "test-secret-key-test-secret-key-0123",
+        "BROADCAST_BACKEND": "memory",
+        "WS_COALESCE_WINDOW_MS": "0",
+        "ARGON2_TIME_COST": "1",
+        "ARGON2_MEMORY_COST": "1024",
+        "ARGON2_PARALLELISM": "1",
+        "NOTIFICATION_RETENTION_INTERVAL_SECONDS": "0",
+    }
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+from app.database import db  # noqa: E402
+import main  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _database_dir():
+    yield
+    db.engine.dispose()
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture(params=["sync", "async"])
+def client(request, monkeypatch):
+    if request.param == "async":
+        # NullPool: every TestClient runs its own event loop, and aiosqlite
+        # connections must not outlive the loop that opened them.
+        async_engine = create_async_engine(
+            os.environ["ASYNC_DATABASE_URL"], poolclass=NullPool
+        )
+        monkeypatch.setattr(db, "DB_ASYNC", True)
+        monkeypatch.setattr(
+            db, "AsyncSessionLocal", async_sessionmaker(async_engine, autoflush=False)
+        )
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def register(client):
+    """Create a user; returns ``(username, token, headers)``."""
+
+    def _register(prefix: str = "user"):
+        username = f"{prefix}_{uuid.uuid4().hex[:8]}"
+        response = client.post(
+            "/register", json={"username": username, "password": "pw"}
+        )
+        assert response.status_code == 201, response.text
+        token = response.json()["access_token"]
+        return username, token, {"Authorization": f"Bearer {token}"}
+
+    return _register
+
+
+def receive_events(websocket, until: str, limit: int = 50) -> list[dict]:
+    """Read frames, flattening batches, until an event named ``until`` arrives."""
+    events = []
+    for _ in range(limit):
+        frame = websocket.receive_json()
+        frame_events = frame["events"] if frame.get("event") == "batch" else [frame]
+        events.extend(frame_events)
+        if any(event.get("event") == until for event in frame_events):
+            return events
+    raise AssertionError(f"no {until!r} in {events}")
+
+
+class FakeWebSocket:
+    """Records what the server sends, for tests that drive the manager directly."""
+
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        self.close_code = code
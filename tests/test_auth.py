@@ -0,0 +1,58 @@
+import pyotp
+
+from app.auth.token import user_cache
+
+
+def test_register_and_login(client, register):
+    username, _token, headers = register("login")
+    response = client.post("/login", json={"username": username, "password": "pw"})
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+    response = client.post("/login", json={"username": username, "password": "nope"})
+    assert response.status_code == 401
+
+    response = client.post("/register", json={"username": username, "password": "pw"})
+    assert response.status_code == 400
+
+
+def test_enable_twofa_requires_totp_for_project_delete(client, register):
+    _username, _token, headers = register("twofa")
+    secret = client.get("/2fa/setup", headers=headers).json()["secret"]
+    assert client.get("/2fa/status", headers=headers).json()["setup_pending"] is True
+
+    code = pyotp.TOTP(secret).now()
+    response = client.post("/2fa/enable", json={"totp_code": code}, headers=headers)
+    assert response.status_code == 200
+    assert client.get("/2fa/status", headers=headers).json()["enabled"] is True
+
+    project = client.post("/project", json={"name": "P"}, headers=headers).json()
+    response = client.request("DELETE", f"/project/{project['id']}", json={}, headers=headers)
+    assert response.status_code == 400
+
+    response = client.request(
+        "DELETE",
+        f"/project/{project['id']}",
+        json={"totp_code": pyotp.TOTP(secret).now()},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+
+def test_twofa_is_read_from_the_database_not_the_user_cache(client, register):
+    username, _token, headers = register("stale")
+    project = client.post("/project", json={"name": "P"}, headers=headers).json()
+    stale = user_cache.get(username)
+    assert stale is not None
+
+    # Setup and enable handled by workers whose cache predates the setup.
+    secret = client.get("/2fa/setup", headers=headers).json()["secret"]
+    user_cache.set(username, stale)
+    code = pyotp.TOTP(secret).now()
+    response = client.post("/2fa/enable", json={"totp_code": code}, headers=headers)
+    assert response.status_code == 200
+
+    user_cache.set(username, stale)
+    assert client.get("/2fa/status", headers=headers).json()["enabled"] is True
+    response = client.request("DELETE", f"/project/{project['id']}", json={}, headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,152 @@
+import asyncio
+import os
+from pathlib import Path
+import random
+import subprocess
+import sys
+
+import asyncpg
+import pytest
+
+from app.websockets.broadcast import PostgresBackend
+
+NOTIFY_LIMIT = 8000
+SIZE = PostgresBackend.CHUNK_SIZE
+
+
+async def ignore(message):
+    pass
+
+
+def message_of_length(length: int, char: str) -> dict:
+    """A message whose JSON payload is exactly ``length`` characters long."""
+    message = {"data": {"text": ""}}
+    backend = PostgresBackend(ignore, dsn="unused")
+    overhead = len(backend._chunks(message)[0])
+    escaped = len(backend._chunks({"data": {"text": char}})[0]) - overhead
+    count, rest = divmod(length - overhead, escaped)
+    message["data"]["text"] = char * count + "a" * rest
+    return message
+
+
+@pytest.mark.parametrize("char", ["é", "汉", "🙂"])
+@pytest.mark.parametrize("length", [SIZE - 1, SIZE, SIZE + 1, 3 * SIZE + 7])
+def test_chunks_round_trip_multibyte_payloads(char, length):
+    backend = PostgresBackend(ignore, dsn="unused")
+    message = message_of_length(length, char)
+    chunks = backend._chunks(message)
+
+    assert len(chunks) == (1 if length <= SIZE else -(-length // SIZE))
+    for chunk in chunks:
+        assert len(chunk.encode()) < NOTIFY_LIMIT
+
+    random.Random(length).shuffle(chunks)
+    results = [backend._reassemble(chunk) for chunk in chunks]
+    assert results[-1] == message
+    assert results[:-1] == [None] * (len(chunks) - 1)
+    assert backend._partial == {}
+
+
+def test_interleaved_chunked_messages_are_reassembled_separately():
+    backend = PostgresBackend(ignore, dsn="unused")
+    first = message_of_length(2 * SIZE + 1, "é")
+    second = message_of_length(2 * SIZE + 1, "汉")
+    a, b = backend._chunks(first), backend._chunks(second)
+    interleaved = [chunk for pair in zip(a, b) for chunk in pair]
+    done = [m for m in map(backend._reassemble, interleaved) if m is not None]
+    assert done == [first, second]
+
+
+class FakeConnection:
+    def __init__(self, log):
+        self.log = log
+
+    def acquire(self):
+        return self
+
+    def transaction(self):
+        return self
+
+    async def __aenter__(self):
+        self.log.append("begin")
+        return self
+
+    async def __aexit__(self, *exc):
+        self.log.append("commit")
+
+    async def executemany(self, query, args):
+        self.log.append((query, args))
+
+
+def test_publish_many_sends_all_chunks_in_one_transaction():
+    log = []
+    backend = PostgresBackend(ignore, dsn="unused", channel="ch")
+    backend._pool = FakeConnection(log)
+    messages = [{"n": 1}, message_of_length(2 * SIZE, "é"), {"n": 2}]
+    asyncio.run(backend.publish_many(messages))
+
+    begin, _, (query, args), commit, _ = log
+    assert (begin, commit) == ("begin", "commit")
+    assert query == "SELECT pg_notify($1, $2)"
+    expected = [chunk for m in messages for chunk in backend._chunks(m)]
+    assert [channel for channel, _ in args] == ["ch"] * len(args)
+    assert len(args) == len(expected) == 4
+    rebuilt = [m for m in (backend._reassemble(p) for _, p in args) if m is not None]
+    assert rebuilt == messages
+
+
+def test_listener_reconnects_after_errors_and_lost_connections(monkeypatch):
+    class Listener:
+        def __init__(self, lose: bool):
+            self.lose = lose
+
+        def add_termination_listener(self, callback):
+            if self.lose:
+                asyncio.get_running_loop().call_soon(callback, self)
+
+        async def add_listener(self, channel, callback):
+            listening.append(channel)
+
+        async def close(self):
+            pass
+
+    attempts = []
+    listening = []
+
+    async def connect(dsn):
+        attempts.append(dsn)
+        if len(attempts) == 1:
+            raise OSError("connection refused")
+        return Listener(lose=len(attempts) == 2)
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+
+    async def scenario():
+        backend = PostgresBackend(ignore, dsn="dsn", channel="ch", reconnect_delay=0)
+        task = asyncio.create_task(backend._listen_forever())
+        for _ in range(100):
+            if len(listening) == 2:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert len(attempts) == 3
+    assert listening == ["ch", "ch"]
+
+
+def test_memory_backend_does_not_need_asyncpg():
+    code = (
+        "import sys; sys.modules['asyncpg'] = None\n"
+        "from app.websockets.broadcast import MemoryBackend, create_backend\n"
+        "assert isinstance(create_backend(None), MemoryBackend)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parent.parent,
+        env={**os.environ, "BROADCAST_BACKEND": "memory"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,39 @@
+import asyncio
+import logging
+
+from app.websockets.dispatch import DispatchQueue
+
+
+def test_messages_are_published_in_order():
+    published = []
+
+    async def publish(batch):
+        published.extend(batch)
+
+    async def scenario():
+        queue = DispatchQueue(publish)
+        loop = asyncio.get_running_loop()
+        for n in range(3):
+            assert queue.put({"n": n}, loop)
+        await asyncio.sleep(0)
+        await queue.join()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert published == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert queue.stats()["delivered"] == 3
+
+
+def test_put_without_a_running_loop_counts_and_logs_the_drop(caplog):
+    async def publish(batch):
+        raise AssertionError("nothing should be published")
+
+    queue = DispatchQueue(publish)
+    stopped_loop = asyncio.new_event_loop()
+    with caplog.at_level(logging.WARNING):
+        assert not queue.put({"data": {"event": "todo.created"}}, None)
+        assert not queue.put({"data": None}, stopped_loop)
+    stopped_loop.close()
+    assert queue.stats()["failed"] == 2
+    assert queue.depth == 0
+    assert "dropped a websocket message" in caplog.text
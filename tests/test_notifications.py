@@ -0,0 +1,83 @@
+def _project_with_member(client, register):
+    _, _, owner = register("owner")
+    _, _, member = register("member")
+    project = client.post("/project", json={"name": "N"}, headers=owner).json()
+    invite = client.post(f"/project/{project['id']}/invite", json={}, headers=owner).json()
+    assert client.post(f"/invite/{invite['id']}/join", headers=member).status_code == 200
+    return project, owner, member
+
+
+def _unread(client, headers):
+    return client.get("/projects", headers=headers).json()["unread_notifications_count"]
+
+
+def test_join_notifies_owner_and_member(client, register):
+    _project, owner, member = _project_with_member(client, register)
+    assert _unread(client, owner) == 1
+    assert _unread(client, member) == 1
+    titles = [n["title"] for n in client.get("/notifications", headers=member).json()]
+    assert titles == ["User Joined Project"]
+
+
+def test_mark_read_endpoints_keep_counter_in_step(client, register):
+    project, owner, member = _project_with_member(client, register)
+    for _ in range(3):
+        client.post(f"/project/{project['id']}/leave", headers=member)
+        invite = client.post(f"/project/{project['id']}/invite", json={}, headers=owner).json()
+        client.post(f"/invite/{invite['id']}/join", headers=member)
+    ids = [n["id"] for n in client.get("/notifications", headers=owner).json()]
+    assert _unread(client, owner) == len(ids) == 7
+
+    response = client.post(f"/notifications/{ids[0]}/read", headers=owner).json()
+    assert response["unread_notifications_count"] == 6
+    response = client.post(f"/notifications/{ids[0]}/read", headers=owner).json()
+    assert response["message"] == "Notification already marked as read"
+    assert client.post("/notifications/missing/read", headers=owner).status_code == 404
+
+    response = client.post(
+        "/notifications/read", json={"notification_ids": ids[:3] + ["missing"]}, headers=owner
+    ).json()
+    assert response["marked"] == 2
+    assert response["unread_notifications_count"] == 4
+
+    response = client.post("/notifications/read-all", headers=owner).json()
+    assert response["unread_notifications_count"] == 0
+    assert _unread(client, owner) == 0
+    response = client.post("/notifications/read-all", headers=owner).json()
+    assert response["message"] == "No unread notifications found"
+
+
+def test_feed_pages_and_unread_filter(client, register):
+    project, owner, member = _project_with_member(client, register)
+    for _ in range(4):
+        client.post(f"/project/{project['id']}/leave", headers=member)
+        invite = client.post(f"/project/{project['id']}/invite", json={}, headers=owner).json()
+        client.post(f"/invite/{invite['id']}/join", headers=member)
+    everything = [n["id"] for n in client.get("/notifications", headers=owner).json()]
+
+    paged, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/notifications/feed", params=params, headers=owner).json()
+        paged += [n["id"] for n in page["notifications"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert paged == everything
+
+    client.post("/notifications/read", json={"notification_ids": everything[:4]}, headers=owner)
+    page = client.get(
+        "/notifications/feed", params={"unread_only": True, "limit": 50}, headers=owner
+    ).json()
+    assert [n["id"] for n in page["notifications"]] == everything[4:]
+    assert page["unread_notifications_count"] == len(everything) - 4
+
+    response = client.get("/notifications/feed", params={"cursor": "zz"}, headers=owner)
+    assert response.status_code == 400
+
+
+def test_deleting_project_discounts_unread(client, register):
+    project, owner, member = _project_with_member(client, register)
+    assert client.request("DELETE", f"/project/{project['id']}", json={}, headers=owner).status_code == 200
+    assert _unread(client, owner) == 0
+    assert _unread(client, member) == 0
@@ -0,0 +1,86 @@
+import asyncio
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from app.websockets.outbound import ClientConnection, SendStats
+from conftest import FakeWebSocket
+
+
+def queued(client):
+    return [frame for _, frame in client._queue if frame is not None]
+
+
+def test_drop_policy_caps_the_queue_and_drops_the_oldest():
+    client = ClientConnection(FakeWebSocket(), SendStats(), high_water=2, policy="drop")
+    for frame in ("a", "b", "c"):
+        assert client.enqueue(frame)
+    assert client.depth == 2
+    assert queued(client) == ["b", "c"]
+    assert client.stats.dropped == 1
+
+    assert client.enqueue("hello", force=True)
+    assert client.depth == 3
+
+
+def test_coalesce_policy_supersedes_frames_with_the_same_key():
+    client = ClientConnection(
+        FakeWebSocket(), SendStats(), high_water=2, policy="coalesce"
+    )
+    client.enqueue("todo 1 v1", key="todo:1")
+    client.enqueue("other")
+    # At the high-water mark, a frame that supersedes another drops nothing.
+    client.enqueue("todo 1 v2", key="todo:1")
+    assert queued(client) == ["other", "todo 1 v2"]
+    assert (client.stats.coalesced, client.stats.dropped) == (1, 0)
+
+    client.enqueue("todo 2", key="todo:2")
+    assert queued(client) == ["todo 1 v2", "todo 2"]
+    assert client.stats.dropped == 1
+    assert client.depth == 2
+
+
+def test_disconnect_policy_closes_with_try_again_later():
+    async def scenario():
+        websocket = FakeWebSocket()
+        client = ClientConnection(
+            websocket, SendStats(), high_water=1, policy="disconnect"
+        )
+        assert client.enqueue("a")
+        assert not client.enqueue("b")
+        assert not client.enqueue("c")
+        await asyncio.sleep(0)
+        return client, websocket
+
+    client, websocket = asyncio.run(scenario())
+    assert client.closed
+    assert client.stats.evicted == 1
+    assert websocket.close_code == 1013
+
+
+def test_pop_returns_none_when_only_superseded_entries_are_left():
+    client = ClientConnection(FakeWebSocket(), SendStats(), policy="coalesce")
+    assert client._pop() is None
+    client.enqueue("v1", key="k")
+    client._queue[0][1] = None
+    client._superseded = 1
+    assert client._pop() is None
+    assert client.depth == 0
+
+
+@pytest.mark.parametrize(
+    "setting", ["WS_QUEUE_HIGH_WATER", "WS_MAX_CONNECTIONS_PER_USER"]
+)
+def test_limits_below_one_are_rejected_at_import(setting):
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.websockets.outbound"],
+        cwd=Path(__file__).resolve().parent.parent,
+        env={**os.environ, setting: "0"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode != 0
+    assert f"{setting} must be at least 1" in result.stderr
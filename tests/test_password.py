@@ -0,0 +1,38 @@
+import asyncio
+import threading
+
+from app.utils import password
+
+
+def test_login_is_rejected_with_retry_after_when_hashing_is_saturated(
+    client, register, monkeypatch
+):
+    username, _token, _headers = register("busy")
+    monkeypatch.setattr(password, "PASSWORD_HASH_MAX_PENDING", 0)
+    response = client.post("/login", json={"username": username, "password": "pw"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_hash_finishes():
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        finish.wait(5)
+        return "hash"
+
+    async def scenario():
+        task = asyncio.create_task(password._run_in_hash_executor(slow_hash))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        still_pending = password._pending
+        finish.set()
+        for _ in range(100):
+            if password._pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        return still_pending, password._pending
+
+    assert asyncio.run(scenario()) == (1, 0)
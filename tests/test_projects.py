@@ -0,0 +1,75 @@
+def _join(client, owner_headers, member_headers, project_id):
+    invite = client.post(
+        f"/project/{project_id}/invite", json={}, headers=owner_headers
+    ).json()
+    response = client.post(f"/invite/{invite['id']}/join", headers=member_headers)
+    assert response.status_code == 200, response.text
+
+
+def test_project_membership_lifecycle(client, register):
+    _, _, owner = register("owner")
+    _, _, member = register("member")
+
+    project = client.post("/project", json={"name": "Board"}, headers=owner).json()
+    _join(client, owner, member, project["id"])
+
+    listing = client.get("/projects", headers=member).json()
+    assert [p["id"] for p in listing["invited_projects"]] == [project["id"]]
+    usernames = {m["username"] for m in listing["invited_projects"][0]["team_members"]}
+    assert "You" in usernames and len(usernames) == 2
+
+    response = client.post(f"/project/{project['id']}/leave", headers=member)
+    assert response.status_code == 200
+    assert client.get("/projects", headers=member).json()["invited_projects"] == []
+
+    response = client.request("DELETE", f"/project/{project['id']}", json={}, headers=owner)
+    assert response.status_code == 200
+    assert client.get(f"/project/{project['id']}", headers=owner).status_code == 404
+
+
+def test_todo_listing_pages_match_full_listing(client, register):
+    _, _, owner = register("todos")
+    project = client.post("/project", json={"name": "Todos"}, headers=owner).json()
+    for i, priority in enumerate(["high", "low", None, "medium"] * 3):
+        response = client.post(
+            "/todo",
+            json={"title": f"t{i}", "project_id": project["id"], "priority": priority},
+            headers=owner,
+        )
+        assert response.status_code == 200, response.text
+
+    full = [t["id"] for t in client.get(f"/todos/{project['id']}", headers=owner).json()["todos"]]
+    assert len(full) == 12
+
+    paged, cursor = [], None
+    while True:
+        params = {"limit": 5, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/todos/{project['id']}", params=params, headers=owner).json()
+        paged += [t["id"] for t in page["todos"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert paged == full
+
+    response = client.get("/todos", params={"cursor": "garbage"}, headers=owner)
+    assert response.status_code == 400
+
+
+def test_statistics_list_the_same_projects_as_the_listing(client, register):
+    _, _, owner = register("stats")
+    _, _, member = register("statm")
+    _, _, outsider = register("stato")
+
+    own = client.post("/project", json={"name": "Own"}, headers=member).json()
+    shared = client.post("/project", json={"name": "Shared"}, headers=owner).json()
+    client.post("/project", json={"name": "Other"}, headers=outsider)
+    _join(client, owner, member, shared["id"])
+    client.post("/todo", json={"title": "t", "project_id": shared["id"]}, headers=owner)
+
+    listing = client.get("/projects", headers=member).json()
+    stats = client.get("/projects/statistics", headers=member).json()
+    for key, expected in (("my_projects", [own["id"]]), ("invited_projects", [shared["id"]])):
+        assert [p["id"] for p in listing[key]] == expected
+        assert [p["id"] for p in stats[key]] == expected
+    shared_stats = stats["invited_projects"][0]
+    assert shared_stats["total_tasks"] == 1 and len(shared_stats["team_members"]) == 2
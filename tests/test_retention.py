@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+import json
+import os
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.database.db import SessionLocal
+from app.models import Notification, User, UserNotification
+from app.utils import retention
+
+OLD = datetime.utcnow() - timedelta(days=100)
+NEW = datetime.utcnow() - timedelta(days=1)
+CUTOFF = datetime.utcnow() - timedelta(days=90)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def add_user(db) -> str:
+    user_id = str(uuid.uuid4())
+    db.add(User(id=user_id, username=f"ret_{user_id[:8]}", password="x", avatar_id=1))
+    return user_id
+
+
+def add_notification(db, created_at, reads: dict[str, bool]) -> str:
+    notification_id = str(uuid.uuid4())
+    db.add(
+        Notification(
+            id=notification_id, title=f"n {notification_id[:8]}", created_at=created_at
+        )
+    )
+    for user_id, read in reads.items():
+        db.add(
+            UserNotification(
+                user_id=user_id,
+                notification_id=notification_id,
+                read=read,
+                created_at=created_at,
+            )
+        )
+    return notification_id
+
+
+def remaining(db, user_ids) -> set:
+    rows = db.execute(
+        select(UserNotification.user_id, UserNotification.notification_id).where(
+            UserNotification.user_id.in_(user_ids)
+        )
+    )
+    return set(map(tuple, rows))
+
+
+def test_purge_archives_old_read_rows_and_keeps_unread(db, tmp_path):
+    alice, bob = add_user(db), add_user(db)
+    shared = add_notification(db, OLD, {alice: True, bob: False})
+    old_read = add_notification(db, OLD, {alice: True})
+    recent = add_notification(db, NEW, {alice: True})
+    db.commit()
+
+    archive_path = tmp_path / "archive.jsonl"
+    with open(archive_path, "a", encoding="utf-8") as archive:
+        purged = retention.purge_read_notifications(db, CUTOFF, 1, archive)
+
+    assert remaining(db, [alice, bob]) == {(bob, shared), (alice, recent)}
+    archived = [json.loads(line) for line in archive_path.read_text().splitlines()]
+    assert purged == len(archived) == 2
+    assert {(r["user_id"], r["notification_id"]) for r in archived} == {
+        (alice, shared),
+        (alice, old_read),
+    }
+    for record in archived:
+        assert record["read"] is True
+        assert record["title"] == f"n {record['notification_id'][:8]}"
+        assert datetime.fromisoformat(record["created_at"]) == OLD
+
+
+def test_orphans_go_only_once_unreferenced_and_old(db):
+    alice, bob = add_user(db), add_user(db)
+    shared = add_notification(db, OLD, {alice: True, bob: False})
+    old_read = add_notification(db, OLD, {alice: True})
+    recent_orphan = add_notification(db, NEW, {})
+    db.commit()
+
+    retention.purge_read_notifications(db, CUTOFF, 10)
+    assert retention.purge_orphaned_notifications(db, CUTOFF, 1) >= 1
+    ids = set(db.execute(select(Notification.id)).scalars())
+    assert old_read not in ids
+    # Bob still has it unread; the recent one is newer than the cutoff.
+    assert {shared, recent_orphan} <= ids
+
+    db.query(UserNotification).filter(UserNotification.user_id == bob).update(
+        {"read": True}
+    )
+    db.commit()
+    retention.purge_read_notifications(db, CUTOFF, 10)
+    retention.purge_orphaned_notifications(db, CUTOFF, 1)
+    ids = set(db.execute(select(Notification.id)).scalars())
+    assert shared not in ids and recent_orphan in ids
+
+
+def test_run_retention_skips_while_another_runner_holds_the_lock(db, monkeypatch):
+    alice = add_user(db)
+    add_notification(db, OLD, {alice: True})
+    db.commit()
+
+    monkeypatch.setattr(retention, "_try_lock", lambda connection: False)
+    assert retention.run_retention(days=90) == {"skipped": True}
+    assert len(remaining(db, [alice])) == 1
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set"
+)
+def test_advisory_lock_admits_one_runner_at_a_time():
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    try:
+        with engine.connect() as first, engine.connect() as second:
+            assert retention._try_lock(first)
+            assert not retention._try_lock(second)
+            retention._unlock(first)
+            assert retention._try_lock(second)
+            retention._unlock(second)
+    finally:
+        engine.dispose()
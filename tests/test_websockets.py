@@ -0,0 +1,217 @@
+import asyncio
+import json
+
+import msgpack
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.websockets.coalescer import EventCoalescer
+from app.websockets import connection_manager
+from app.websockets.connection_manager import ConnectionManager
+from app.websockets.replay import UserStream
+from conftest import FakeWebSocket, receive_events
+
+
+def test_socket_gets_hello_and_project_events(client, register):
+    _, token, owner = register("ws")
+    with client.websocket_connect(f"/ws?token={token}") as websocket:
+        hello = websocket.receive_json()
+        assert hello["event"] == "hello" and hello["encoding"] == "json"
+
+        project = client.post("/project", json={"name": "Live"}, headers=owner).json()
+        client.post("/todo", json={"title": "t", "project_id": project["id"]}, headers=owner)
+        events = receive_events(websocket, "todo.created")
+        assert [e["event"] for e in events] == ["project.created", "todo.created"]
+        assert [e["seq"] for e in events] == [1, 2]
+
+
+def test_socket_rejects_bad_token(client):
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/ws?token=bogus"):
+            pass
+    assert closed.value.code == 1008
+
+
+def test_heartbeat_closes_reaped_sockets():
+    async def scenario():
+        manager = ConnectionManager()
+        manager.idle_timeout = 0.01
+        websocket = FakeWebSocket()
+        assert await manager.connect("u1", websocket)
+        await asyncio.sleep(0.02)
+        manager._heartbeat('{"event":"ping"}')
+        await asyncio.sleep(0.01)
+        return manager, websocket
+
+    manager, websocket = asyncio.run(scenario())
+    assert websocket.close_code == 1001
+    assert manager.connection_count == 0
+    assert manager.reaped == 1
+
+
+def test_heartbeat_keeps_silent_clients_by_default():
+    async def scenario():
+        manager = ConnectionManager()
+        websocket = FakeWebSocket()
+        assert await manager.connect("u1", websocket)
+        manager._heartbeat('{"event":"ping"}')
+        await asyncio.sleep(0.01)
+        return manager, websocket
+
+    manager, websocket = asyncio.run(scenario())
+    assert websocket.close_code is None
+    assert manager.connection_count == 1
+    assert websocket.sent[-1] == '{"event":"ping"}'
+
+
+def test_coalescing_window_keeps_events_of_different_users_apart():
+    async def scenario():
+        manager = ConnectionManager()
+        manager._coalescer = EventCoalescer(manager._send_entries, window_ms=20)
+        alice, bob = FakeWebSocket(), FakeWebSocket()
+        await manager.connect("alice", alice)
+        await manager.connect("bob", bob)
+        for user_id in ("alice", "bob"):
+            await manager.send_personal(
+                user_id, {"event": "project.sorted", "user": user_id}
+            )
+            await manager.send_personal(
+                user_id,
+                {"event": "notification.unread_count", "unread_notifications_count": 3},
+            )
+        await manager.send_personal("alice", {"event": "project.sorted", "user": "again"})
+        await asyncio.sleep(0.05)
+        return manager, alice, bob
+
+    manager, alice, bob = asyncio.run(scenario())
+    for websocket, user_id in ((alice, "alice"), (bob, "bob")):
+        frame = json.loads(websocket.sent[-1])
+        assert frame["event"] == "batch"
+        events = frame["events"]
+        assert sorted(e["event"] for e in events) == [
+            "notification.unread_count",
+            "project.sorted",
+        ]
+        sorted_event = next(e for e in events if e["event"] == "project.sorted")
+        assert sorted_event["user"] == ("again" if user_id == "alice" else "bob")
+    assert manager._coalescer.merged == 1
+
+
+def test_msgpack_socket_gets_packed_frames(client, register):
+    _, token, owner = register("mp")
+    with client.websocket_connect(f"/ws?token={token}&encoding=msgpack") as websocket:
+        hello = msgpack.unpackb(websocket.receive_bytes())
+        assert hello["event"] == "hello" and hello["encoding"] == "msgpack"
+
+        client.post("/project", json={"name": "Packed"}, headers=owner)
+        frame = msgpack.unpackb(websocket.receive_bytes())
+        events = frame["events"] if frame["event"] == "batch" else [frame]
+        assert events[0]["event"] == "project.created"
+        assert frame["seq"] == 1
+
+
+def test_msgpack_frames_are_packed_once_and_shared():
+    async def scenario():
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(3)]
+        await manager.connect("u1", sockets[0], encoding="msgpack")
+        await manager.connect("u1", sockets[1], encoding="msgpack")
+        await manager.connect("u1", sockets[2])
+        manager._send_entries([(["u1"], {"event": "todo.deleted", "todo_id": "t1"})])
+        await asyncio.sleep(0.01)
+        return sockets
+
+    packed, shared, text = (ws.sent[-1] for ws in asyncio.run(scenario()))
+    assert packed is shared
+    assert packed == msgpack.packb(json.loads(text))
+    assert msgpack.unpackb(packed) == {"seq": 1, "event": "todo.deleted", "todo_id": "t1"}
+
+
+def replay_scenario(reconnect):
+    """Send three events to u1 and reconnect via ``reconnect(manager, socket)``."""
+
+    async def scenario():
+        manager = ConnectionManager()
+        first, second = FakeWebSocket(), FakeWebSocket()
+        await manager.connect("u1", first)
+        manager._streams["u1"] = UserStream(size=2)
+        for n in range(3):
+            manager._send_entries([(["u1"], {"event": "todo.deleted", "todo_id": n})])
+        await asyncio.sleep(0.01)
+        manager.disconnect("u1", first)
+        await reconnect(manager, second)
+        await asyncio.sleep(0.01)
+        return manager, [json.loads(text) for text in second.sent]
+
+    return asyncio.run(scenario())
+
+
+def test_resume_within_the_buffer_replays_missed_frames():
+    manager, frames = replay_scenario(
+        lambda manager, ws: manager.connect("u1", ws, since=1, epoch=manager.epoch)
+    )
+    assert frames[0]["event"] == "hello" and frames[0]["seq"] == 3
+    assert [(f["seq"], f["todo_id"]) for f in frames[1:]] == [(2, 1), (3, 2)]
+    assert manager.replayed == 2
+
+
+def test_resume_past_the_buffer_sends_resync():
+    manager, frames = replay_scenario(
+        lambda manager, ws: manager.connect("u1", ws, since=0, epoch=manager.epoch)
+    )
+    assert [f["event"] for f in frames] == ["hello", "resync"]
+    assert manager.resyncs == 1
+
+
+@pytest.mark.parametrize("epoch", ["another-worker", None])
+def test_resume_with_a_foreign_or_missing_epoch_sends_resync(epoch):
+    manager, frames = replay_scenario(
+        lambda manager, ws: manager.connect("u1", ws, since=2, epoch=epoch)
+    )
+    assert [f["event"] for f in frames] == ["hello", "resync"]
+
+
+def test_socket_resumes_through_the_query_string(client, register):
+    _, token, owner = register("resume")
+    with client.websocket_connect(f"/ws?token={token}") as websocket:
+        hello = websocket.receive_json()
+        client.post("/project", json={"name": "Missed"}, headers=owner)
+        receive_events(websocket, "project.created")
+
+    query = f"token={token}&since={hello['seq']}&epoch={hello['epoch']}"
+    with client.websocket_connect(f"/ws?{query}") as websocket:
+        assert websocket.receive_json()["event"] == "hello"
+        replayed = websocket.receive_json()
+        assert replayed["event"] == "project.created"
+        assert replayed["seq"] == hello["seq"] + 1
+
+
+def test_connection_count_follows_connects_evictions_and_disconnects(monkeypatch):
+    monkeypatch.setattr(connection_manager, "WS_MAX_CONNECTIONS_PER_USER", 2)
+    monkeypatch.setattr(connection_manager, "WS_MAX_CONNECTIONS_PER_WORKER", 3)
+
+    async def scenario():
+        manager = ConnectionManager()
+        sockets = [FakeWebSocket() for _ in range(5)]
+        counts = []
+        for websocket in sockets[:3]:
+            assert await manager.connect("u1", websocket)
+            counts.append(manager.connection_count)
+        # The per-user cap evicted the first socket; its late disconnect
+        # must not count twice.
+        manager.disconnect("u1", sockets[0])
+        assert await manager.connect("u2", sockets[3])
+        assert not await manager.connect("u3", sockets[4])
+        counts.append(manager.connection_count)
+        manager.disconnect("u1", sockets[1])
+        manager.disconnect("u2", sockets[3])
+        counts.append(manager.connection_count)
+        actual = sum(len(c) for c in manager._connections.values())
+        await asyncio.sleep(0.01)
+        return manager, sockets, counts, actual
+
+    manager, sockets, counts, actual = asyncio.run(scenario())
+    assert counts == [1, 2, 2, 3, 1]
+    assert actual == 1
+    assert sockets[0].close_code == 1008 and sockets[4].close_code == 1013
+    assert manager.rejected == 1 and manager.over_user_limit == 1